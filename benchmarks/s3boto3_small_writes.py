@@ -0,0 +1,87 @@
+"""
+Times many small writes to an S3Boto3StorageFile, against a mocked S3.
+
+Compares write() as it is, counting the bytes buffered since the last part,
+with write() measuring the buffer by seeking it before every write, as it
+used to. The buffer is kept in memory (AWS_S3_MAX_MEMORY_SIZE 0) or rolled
+over to disk (AWS_S3_MAX_MEMORY_SIZE 1), and is large enough that no part
+is uploaded.
+
+Run from the root of the repository:
+
+    python benchmarks/s3boto3_small_writes.py [--writes 200000] [--repeat 5]
+"""
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import timeit
+
+import django
+from django.conf import settings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+settings.configure(USE_TZ=True)
+django.setup()
+
+from storages.backends import s3boto3  # noqa: E402 isort:skip
+
+try:
+    from unittest import mock
+except ImportError:  # Python 3.2 and below
+    import mock
+
+ROW = b'2017-06-23,12345,some-product-name,42,19.99\r\n'
+
+
+class SeekingS3Boto3StorageFile(s3boto3.S3Boto3StorageFile):
+    """
+    Measures the write buffer by seeking it before every write.
+    """
+    def write(self, content):
+        if self.buffer_size <= self._buffer_file_size():
+            self._flush_write_buffer()
+        return super(SeekingS3Boto3StorageFile, self).write(content)
+
+    def _buffer_file_size(self):
+        pos = self.file.tell()
+        self.file.seek(0, os.SEEK_END)
+        length = self.file.tell()
+        self.file.seek(pos)
+        return length
+
+
+def run(file_class, max_memory_size, writes):
+    storage = s3boto3.S3Boto3Storage(max_memory_size=max_memory_size)
+    storage._connection = mock.MagicMock()
+    storage.bucket.Object.return_value.key = 'benchmark.csv'
+    file = file_class('benchmark.csv', 'wb', storage, buffer_size=1024 ** 3)
+    write = file.write
+    write(ROW)
+    start = timeit.default_timer()
+    for _ in range(writes - 1):
+        write(ROW)
+    elapsed = timeit.default_timer() - start
+    file.file.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--writes', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print('%d writes of %d bytes, best of %d' % (args.writes, len(ROW), args.repeat))
+    print('%-22s %24s %24s' % ('', 'seeking', 'counting'))
+    for label, max_memory_size in (('in memory', 0), ('rolled over to disk', 1)):
+        results = []
+        for file_class in (SeekingS3Boto3StorageFile, s3boto3.S3Boto3StorageFile):
+            best = min(run(file_class, max_memory_size, args.writes) for _ in range(args.repeat))
+            results.append('%.3fs (%.2fus/write)' % (best, best / args.writes * 1e6))
+        print('%-22s %24s %24s' % (label, results[0], results[1]))
+
+
+if __name__ == '__main__':
+    main()
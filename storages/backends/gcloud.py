@@ -1,3 +1,6 @@
+import io
+import mimetypes
+from datetime import timedelta
 from tempfile import SpooledTemporaryFile
 
 from django.core.exceptions import ImproperlyConfigured
@@ -6,35 +9,55 @@ from django.core.files.storage import Storage
 from django.utils import timezone
 from django.utils.deconstruct import deconstructible
 from django.utils.encoding import force_bytes, smart_str
+from django.utils.six.moves.urllib import parse as urlparse
 
-from storages.utils import clean_name, safe_join, setting
+from storages.utils import (
+    LRUCache, RangedReader, clean_name, safe_join, setting,
+)
 
 try:
     from google.cloud.storage.client import Client
     from google.cloud.storage.blob import Blob
-    from google.cloud.exceptions import NotFound
+    from google.cloud.exceptions import GoogleCloudError, NotFound
 except ImportError:
     raise ImproperlyConfigured("Could not load Google Cloud Storage bindings.\n"
                                "See https://github.com/GoogleCloudPlatform/gcloud-python")
 
 
+# Marks names missing from the blob cache, as opposed to cached as missing.
+_MISSING = object()
+
+
 class GoogleCloudFile(File):
     def __init__(self, name, mode, storage):
         self.name = name
         self._mode = mode
         self._storage = storage
-        self.blob = storage.bucket.get_blob(name)
+        if 'w' in mode and 'r' not in mode and '+' not in mode:
+            # The blob is replaced, its metadata isn't needed.
+            self.blob = None
+        else:
+            self.blob = storage._lookup_blob(name)
         if not self.blob and 'w' in mode:
             self.blob = Blob(self.name, storage.bucket)
         self._file = None
         self._is_dirty = False
+        # With an upload chunk size, writes are streamed to a resumable
+        # upload session a chunk at a time rather than uploaded on close().
+        self._upload_url = None
+        self._uploaded = 0
+        self._buffered = 0
 
     @property
     def size(self):
         return self.blob.size
 
     def _get_file(self):
-        if self._file is None:
+        if self._file is None and self._is_ranged:
+            self._file = io.BufferedReader(
+                RangedReader(self._fetch_range, size=self.blob.size),
+                buffer_size=self._storage.ranged_read_buffer_size)
+        elif self._file is None:
             self._file = SpooledTemporaryFile(
                 max_size=self._storage.max_memory_size,
                 suffix=".GSStorageFile",
@@ -49,6 +72,43 @@ class GoogleCloudFile(File):
     def _set_file(self, value):
         self._file = value
 
+    @property
+    def _is_ranged(self):
+        """
+        Whether reads should download byte ranges on demand rather than the
+        whole blob up front. Only used for files opened read-only.
+        """
+        return (self._storage.ranged_reads and 'r' in self._mode and
+                'w' not in self._mode and '+' not in self._mode)
+
+    @property
+    def _media_link(self):
+        """
+        The download URL of the blob, pinned to the generation it was looked
+        up with so that the ranges of a replaced blob aren't mixed.
+        """
+        url = self.blob.media_link
+        generation = self.blob.generation
+        if generation is None or 'generation' in urlparse.parse_qs(urlparse.urlsplit(url).query):
+            return url
+        return '%s%sgeneration=%d' % (url, '&' if '?' in url else '?', generation)
+
+    def _fetch_range(self, start, end):
+        response = self._storage.transport.get(
+            self._media_link, headers={'Range': 'bytes=%d-%d' % (start, end)})
+        if response.status_code == 206:
+            return response.content, self.blob.size
+        if response.status_code == 200:
+            # The whole blob, if the range was ignored.
+            return response.content[start:end + 1], len(response.content)
+        if response.status_code == 416:
+            return b'', self.blob.size
+        if response.status_code == 404:
+            # The generation read is gone, the blob was replaced or deleted.
+            raise IOError('File changed while being read: %s' % self.name)
+        raise GoogleCloudError('Reading %s failed with status %d: %s' % (
+            self.name, response.status_code, response.text))
+
     file = property(_get_file, _set_file)
 
     def read(self, num_bytes=None):
@@ -64,13 +124,93 @@ class GoogleCloudFile(File):
         if 'w' not in self._mode:
             raise AttributeError("File was not opened in write mode.")
         self._is_dirty = True
-        return super(GoogleCloudFile, self).write(force_bytes(content))
+        content = force_bytes(content)
+        if not self._is_streamed:
+            return super(GoogleCloudFile, self).write(content)
+        chunk_size = self._storage.upload_chunk_size
+        if self._buffered + len(content) < chunk_size:
+            self.file.write(content)
+            self._buffered += len(content)
+            return len(content)
+        # Complete the chunk in the write buffer, then upload the whole
+        # chunks of content straight from it, only buffering the remainder.
+        offset = chunk_size - self._buffered
+        self.file.seek(0)
+        self._upload_chunk(self.file.read() + content[:offset])
+        while len(content) - offset >= chunk_size:
+            self._upload_chunk(content[offset:offset + chunk_size])
+            offset += chunk_size
+        self.file.seek(0)
+        self.file.truncate()
+        self.file.write(content[offset:])
+        self._buffered = len(content) - offset
+        return len(content)
+
+    @property
+    def _is_streamed(self):
+        # Files also opened for reading start from the content of the blob,
+        # which can't be streamed.
+        return (self._storage.upload_chunk_size and 'r' not in self._mode and
+                '+' not in self._mode)
+
+    def _upload_chunk(self, chunk):
+        """
+        Uploads the next chunk to the resumable upload session, starting the
+        session first if needed.
+        """
+        if self._upload_url is None:
+            self._upload_url = self.blob.create_resumable_upload_session(
+                content_type=self._content_type, client=self._storage.client)
+        self._put(chunk)
+
+    def _put(self, data, final=False):
+        """
+        Sends ``data`` to the resumable upload session, completing the upload
+        if ``final``. Resends whatever the server didn't persist.
+        """
+        while True:
+            end = self._uploaded + len(data)
+            total = end if final else '*'
+            if data:
+                content_range = 'bytes %d-%d/%s' % (self._uploaded, end - 1, total)
+            else:
+                content_range = 'bytes */%s' % total
+            response = self._storage.transport.put(
+                self._upload_url, data=data, headers={'Content-Range': content_range})
+            if response.status_code in (200, 201):
+                self.blob._set_properties(response.json())
+                self._uploaded = end
+                return
+            if response.status_code != 308:
+                raise GoogleCloudError('Uploading %s failed with status %d: %s' % (
+                    self.name, response.status_code, response.text))
+            # The Range header holds the bytes persisted so far, if any.
+            persisted = 0
+            if 'range' in response.headers:
+                persisted = int(response.headers['range'].rpartition('-')[2]) + 1
+            if persisted <= self._uploaded:
+                raise GoogleCloudError('Uploading %s made no progress past byte %d' % (
+                    self.name, self._uploaded))
+            data = data[persisted - self._uploaded:]
+            self._uploaded = persisted
+            if not data and not final:
+                return
+
+    @property
+    def _content_type(self):
+        # Blobs replaced by files opened write-only aren't fetched, so their
+        # content type is guessed from the name, as when saving a file.
+        return self.blob.content_type or mimetypes.guess_type(self.name)[0]
 
     def close(self):
         if self._file is not None:
             if self._is_dirty:
                 self.file.seek(0)
-                self.blob.upload_from_file(self.file)
+                if self._upload_url is None:
+                    self.blob.upload_from_file(self.file, content_type=self._content_type)
+                else:
+                    self._put(self.file.read(), final=True)
+                self._storage._cache_blob(self.name, self.blob)
             self._file.close()
             self._file = None
 
@@ -87,6 +227,30 @@ class GoogleCloudStorage(Storage):
     # The max amount of memory a returned file can take up before being
     # rolled over into a temporary file on disk. Default is 0: Do not roll over.
     max_memory_size = setting('GS_MAX_MEMORY_SIZE', 0)
+    # Stream files opened for writing to a resumable upload session in chunks
+    # of this many bytes, a multiple of 256 KiB, as they are written. Default
+    # is None: upload them in full on close().
+    upload_chunk_size = setting('GS_UPLOAD_CHUNK_SIZE', None)
+    # Files opened for reading only fetch the byte ranges that are read,
+    # reading ahead by ranged_read_buffer_size bytes at a time, instead of
+    # downloading the whole blob when first accessed.
+    ranged_reads = setting('GS_RANGED_READS', False)
+    ranged_read_buffer_size = setting('GS_RANGED_READ_BUFFER_SIZE', 1048576)
+    # Cache the blobs looked up by exists(), size(), url() and the like, and
+    # the names found not to exist, for metadata_cache_ttl seconds.
+    cache_metadata = setting('GS_CACHE_METADATA', False)
+    metadata_cache_ttl = setting('GS_METADATA_CACHE_TTL', 300)
+    metadata_cache_max_entries = setting('GS_METADATA_CACHE_MAX_ENTRIES', 10000)
+    # url() returns URLs signed with the client's credentials, valid for
+    # expiration, rather than public URLs. signature_version is passed on
+    # to Blob.generate_signed_url() as its version, if set.
+    querystring_auth = setting('GS_QUERYSTRING_AUTH', False)
+    expiration = setting('GS_EXPIRATION', timedelta(seconds=86400))
+    signature_version = setting('GS_SIGNATURE_VERSION', None)
+    # Reuse signed URLs until url_cache_fraction of their expiration has passed
+    cache_urls = setting('GS_CACHE_URLS', False)
+    url_cache_fraction = setting('GS_URL_CACHE_FRACTION', 0.5)
+    url_cache_max_entries = setting('GS_URL_CACHE_MAX_ENTRIES', 10000)
 
     def __init__(self, **settings):
         # check if some of the settings we've provided as class attributes
@@ -95,8 +259,20 @@ class GoogleCloudStorage(Storage):
             if hasattr(self, name):
                 setattr(self, name, value)
 
+        if self.upload_chunk_size and self.upload_chunk_size % (256 * 1024):
+            raise ImproperlyConfigured("GS_UPLOAD_CHUNK_SIZE must be a multiple of 256 KiB.")
+
         self._bucket = None
         self._client = None
+        self._transport = None
+
+        self._blob_cache = None
+        if self.cache_metadata:
+            self._blob_cache = LRUCache(self.metadata_cache_max_entries, ttl=self.metadata_cache_ttl)
+
+        self._url_cache = None
+        if self.cache_urls:
+            self._url_cache = LRUCache(self.url_cache_max_entries)
 
     @property
     def client(self):
@@ -107,6 +283,16 @@ class GoogleCloudStorage(Storage):
             )
         return self._client
 
+    @property
+    def transport(self):
+        """
+        The client's HTTP session, authorized with its credentials, for the
+        requests the client library doesn't make.
+        """
+        if self._transport is None:
+            self._transport = self.client._http
+        return self._transport
+
     @property
     def bucket(self):
         if self._bucket is None:
@@ -153,13 +339,18 @@ class GoogleCloudStorage(Storage):
 
         content.name = cleaned_name
         encoded_name = self._encode_name(name)
-        file = GoogleCloudFile(encoded_name, 'rw', self)
-        file.blob.upload_from_file(content, size=content.size)
+        # Upload without looking up the blob being replaced.
+        blob = Blob(encoded_name, self.bucket)
+        blob.upload_from_file(content, size=content.size,
+                              content_type=mimetypes.guess_type(name)[0])
+        # The upload response holds the metadata of the new blob.
+        self._cache_blob(encoded_name, blob)
         return cleaned_name
 
     def delete(self, name):
         name = self._normalize_name(clean_name(name))
         self.bucket.delete_blob(self._encode_name(name))
+        self._cache_blob(self._encode_name(name), None)
 
     def exists(self, name):
         if not name:  # root element aka the bucket
@@ -170,34 +361,80 @@ class GoogleCloudStorage(Storage):
                 return False
 
         name = self._normalize_name(clean_name(name))
-        return bool(self.bucket.get_blob(self._encode_name(name)))
+        return bool(self._lookup_blob(self._encode_name(name)))
 
-    def listdir(self, name):
+    def iterdir(self, name):
+        """
+        Lists the contents of the directory ``name`` a page of results at a
+        time, yielding a ``(dirs, files)`` tuple of the immediate children
+        found in each page. Only one page is held in memory at once.
+        """
         name = self._normalize_name(clean_name(name))
         # for the bucket.list and logic below name needs to end in /
         # But for the root path "" we leave it as an empty string
         if name and not name.endswith('/'):
             name += '/'
 
-        files_list = list(self.bucket.list_blobs(prefix=self._encode_name(name)))
+        # The blobs in subdirectories are rolled up into prefixes by GCS.
+        iterator = self.bucket.list_blobs(prefix=self._encode_name(name), delimiter='/')
+        for page in iterator.pages:
+            files = []
+            for blob in page:
+                filename = blob.name[len(name):]
+                # Skip the placeholder some tools create for the directory itself
+                if filename:
+                    files.append(filename)
+            dirs = [prefix[len(name):-1] for prefix in page.prefixes
+                    if prefix[len(name):-1]]
+            yield dirs, files
+
+    def listdir(self, name):
+        dirs = []
         files = []
-        dirs = set()
-
-        base_parts = name.split("/")[:-1]
-        for item in files_list:
-            parts = item.name.split("/")
-            parts = parts[len(base_parts):]
-            if len(parts) == 1 and parts[0]:
-                # File
-                files.append(parts[0])
-            elif len(parts) > 1 and parts[0]:
-                # Directory
-                dirs.add(parts[0])
-        return list(dirs), files
+        for page_dirs, page_files in self.iterdir(name):
+            dirs.extend(page_dirs)
+            files.extend(page_files)
+        return dirs, files
+
+    def walk(self, name=''):
+        """
+        Walks the directory tree below ``name`` top-down like ``os.walk()``,
+        yielding a ``(dirpath, dirs, files)`` tuple for each page of results
+        from ``iterdir()``, so a large directory takes several tuples. The
+        directories of a page are walked right after it, and can be removed
+        from ``dirs`` to skip them.
+        """
+        dirpath = self._normalize_name(clean_name(name)).rstrip('/')
+        for dirs, files in self.iterdir(dirpath):
+            yield dirpath, dirs, files
+            for directory in dirs:
+                subdir = dirpath + '/' + directory if dirpath else directory
+                for entry in self.walk(subdir):
+                    yield entry
+
+    def _lookup_blob(self, name):
+        """
+        Returns the blob ``name``, or ``None`` if it doesn't exist, from the
+        metadata cache if enabled.
+        """
+        if self._blob_cache is None:
+            return self.bucket.get_blob(name)
+        blob = self._blob_cache.get(name, _MISSING)
+        if blob is _MISSING:
+            blob = self.bucket.get_blob(name)
+            self._blob_cache.set(name, blob)
+        return blob
+
+    def _cache_blob(self, name, blob):
+        """
+        Records the blob ``name`` was saved as, or ``None`` once deleted.
+        """
+        if self._blob_cache is not None:
+            self._blob_cache.set(name, blob)
 
     def _get_blob(self, name):
         # Wrap google.cloud.storage's blob to raise if the file doesn't exist
-        blob = self.bucket.get_blob(name)
+        blob = self._lookup_blob(name)
 
         if blob is None:
             raise NotFound(u'File does not exist: {}'.format(name))
@@ -221,10 +458,31 @@ class GoogleCloudStorage(Storage):
         return updated if setting('USE_TZ') else timezone.make_naive(updated)
 
     def url(self, name):
+        """
+        Returns the public URL of the file or, with ``GS_QUERYSTRING_AUTH``,
+        a signed URL. Both are built locally, whether the file exists or not.
+        """
         # Preserve the trailing slash after normalizing the path.
         name = self._normalize_name(clean_name(name))
-        blob = self._get_blob(self._encode_name(name))
-        return blob.public_url
+        # A bucket which isn't fetched like self.bucket is, the URL only
+        # needs its name.
+        bucket = self._bucket if self._bucket is not None else self.client.bucket(self.bucket_name)
+        blob = Blob(self._encode_name(name), bucket)
+        if not self.querystring_auth:
+            return blob.public_url
+
+        if self._url_cache is not None:
+            url = self._url_cache.get(name)
+            if url is not None:
+                return url
+        kwargs = {}
+        if self.signature_version:
+            kwargs['version'] = self.signature_version
+        url = blob.generate_signed_url(self.expiration, **kwargs)
+        if self._url_cache is not None:
+            self._url_cache.set(
+                name, url, ttl=self.expiration.total_seconds() * self.url_cache_fraction)
+        return url
 
     def get_available_name(self, name, max_length=None):
         if self.file_overwrite:
@@ -1,9 +1,24 @@
+import errno
+import hashlib
+import io
+import json
 import mimetypes
 import os
 import posixpath
+import shutil
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import (
+    ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait,
+)
+from datetime import datetime
 from gzip import GzipFile
-from tempfile import SpooledTemporaryFile
+from itertools import islice
+from operator import itemgetter
+from tempfile import NamedTemporaryFile, SpooledTemporaryFile, gettempdir
 
+from django.core.cache import caches
 from django.core.exceptions import ImproperlyConfigured, SuspiciousOperation
 from django.core.files.base import File
 from django.core.files.storage import Storage
@@ -11,15 +26,18 @@ from django.utils.deconstruct import deconstructible
 from django.utils.encoding import (
     filepath_to_uri, force_bytes, force_text, smart_text,
 )
-from django.utils.six import BytesIO
+from django.utils.module_loading import import_string
 from django.utils.six.moves.urllib import parse as urlparse
-from django.utils.timezone import is_naive, localtime
+from django.utils.timezone import is_naive, localtime, utc
 
-from storages.utils import safe_join, setting
+from storages.utils import LRUCache, RangedReader, safe_join, setting
 
 try:
     import boto3.session
     from boto3 import __version__ as boto3_version
+    from boto3.s3.transfer import (
+        BaseSubscriber, TransferConfig, create_transfer_manager,
+    )
     from botocore.client import Config
     from botocore.exceptions import ClientError
 except ImportError:
@@ -33,6 +51,340 @@ if boto3_version_info[:2] < (1, 2):
     raise ImproperlyConfigured("The installed Boto3 library must be 1.2.0 or "
                                "higher.\nSee https://github.com/boto/boto3")
 
+# S3 resources created by S3Boto3Storage.connection, keyed by the credentials
+# and configuration they were created with. Their low-level clients (and so
+# their connection pools) are shared by every storage using the same key. The
+# least recently used are dropped, e.g. once temporary credentials rotate.
+_connections = LRUCache(32)
+_connections_lock = threading.Lock()
+
+
+def _config_key(config):
+    """
+    Returns a key telling botocore Configs apart by the options they were
+    given, or ``None`` if they can't be compared.
+    """
+    options = getattr(config, '_user_provided_options', None)
+    if options is None:
+        return None
+    return json.dumps(options, sort_keys=True, default=repr)
+
+
+# The metadata of an object kept by S3MetadataCache.
+S3ObjectMetadata = namedtuple('S3ObjectMetadata', ['size', 'last_modified', 'etag'])
+
+
+class S3MetadataCache(object):
+    """
+    A cache of object metadata, populated a directory at a time.
+
+    The first lookup of a name lists the immediate children of its directory
+    with ``list_directory(prefix)``, which yields ``(name, metadata)`` pairs.
+    Until the listing expires after ``ttl`` seconds it answers lookups for
+    every name in that directory, including names that don't exist. The least
+    recently used directories are evicted to keep at most ``max_entries``
+    names cached. Names in directories too large to cache at all, and names
+    whose metadata changed since the listing, are looked up with
+    ``head(name)``, which returns the metadata or ``None``.
+    """
+    # Marks names whose metadata changed since their directory was listed.
+    _STALE = object()
+
+    def __init__(self, list_directory, head, ttl, max_entries):
+        self._list_directory = list_directory
+        self._head = head
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # prefix -> (expiry time, {name: metadata}), least recently used first
+        self._directories = OrderedDict()
+        self._size = 0
+        # Directories found too large to cache, which aren't listed again
+        # until they expire.
+        self._oversized = LRUCache(max_entries, ttl=ttl)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _prefix(name):
+        directory, sep, _ = name.rpartition('/')
+        return directory + sep
+
+    def _load(self, prefix):
+        entries = {}
+        for name, metadata in self._list_directory(prefix):
+            entries[name] = metadata
+            if len(entries) > self.max_entries:
+                self._oversized.set(prefix, True)
+                return None
+        with self._lock:
+            self._pop(prefix)
+            self._directories[prefix] = (time.time() + self.ttl, entries)
+            self._size += len(entries)
+            while self._size > self.max_entries:
+                self._pop(next(iter(self._directories)))
+        return entries
+
+    def _pop(self, prefix):
+        expires, entries = self._directories.pop(prefix, (None, {}))
+        self._size -= len(entries)
+        return expires, entries
+
+    def get(self, name):
+        """
+        Returns the metadata of ``name``, or ``None`` if it doesn't exist.
+        """
+        prefix = self._prefix(name)
+        if self._oversized.get(prefix):
+            return self._head(name)
+        with self._lock:
+            expires, entries = self._pop(prefix)
+            if expires is not None and expires > time.time():
+                # Move to the most recently used end.
+                self._directories[prefix] = (expires, entries)
+                self._size += len(entries)
+            else:
+                entries = None
+        if entries is None:
+            entries = self._load(prefix)
+            if entries is None:
+                return self._head(name)
+        metadata = entries.get(name)
+        if metadata is self._STALE:
+            metadata = self._head(name)
+            with self._lock:
+                if entries.get(name) is self._STALE:
+                    if metadata is None:
+                        del entries[name]
+                        self._size -= 1
+                    else:
+                        entries[name] = metadata
+        return metadata
+
+    def remove(self, name):
+        """
+        Records that ``name`` no longer exists.
+        """
+        with self._lock:
+            expires, entries = self._directories.get(self._prefix(name), (None, {}))
+            if entries.pop(name, None) is not None:
+                self._size -= 1
+
+    def invalidate(self, name):
+        """
+        Records that the metadata of ``name`` has changed, to be looked up
+        again on its own rather than by listing its directory.
+        """
+        with self._lock:
+            expires, entries = self._directories.get(self._prefix(name), (None, None))
+            if entries is None:
+                return
+            if name not in entries:
+                self._size += 1
+            entries[name] = self._STALE
+            while self._size > self.max_entries:
+                self._pop(next(iter(self._directories)))
+
+    def clear(self):
+        with self._lock:
+            self._directories.clear()
+            self._size = 0
+        self._oversized.clear()
+
+
+class S3ReadCache(object):
+    """
+    An on-disk cache of object bodies, along with the ETag and encoding they
+    were downloaded with, holding at most ``max_size`` bytes in
+    ``directory``. The least recently read bodies are evicted first.
+
+    Each object has a fixed path, named after a hash of its bucket and key,
+    and a ``.json`` file next to it holding its ETag, encoding and size. Both
+    are written to a temporary file and renamed into place, so the directory
+    can be shared between processes. The size of the cache is tracked in
+    memory; the directory is only scanned again, to account for the files
+    other processes cached, when it seems full and wasn't scanned in the last
+    ``scan_interval`` seconds.
+    """
+    scan_interval = 60
+
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+        # path -> size of the cached bodies, least recently read first
+        self._entries = OrderedDict()
+        self._total = 0
+        self._scanned = None
+        self._lock = threading.Lock()
+
+    def _path(self, bucket_name, key):
+        return os.path.join(
+            self.directory, hashlib.sha1(force_bytes('%s/%s' % (bucket_name, key))).hexdigest())
+
+    def open(self, bucket_name, key):
+        """
+        Returns an open file holding the cached body of the object, its ETag
+        and its encoding, or ``None`` if it isn't cached.
+        """
+        path = self._path(bucket_name, key)
+        try:
+            with open(path + '.json') as info_file:
+                info = json.load(info_file)
+            cached = open(path, 'rb')
+        except (IOError, ValueError):
+            # Not cached, evicted or being replaced.
+            return None
+        if os.fstat(cached.fileno()).st_size != info['size']:
+            # Replaced in the meantime.
+            cached.close()
+            return None
+        # Record the read for eviction, by other processes too.
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        with self._lock:
+            self._track(path, info['size'])
+        return cached, info['etag'], info['encoding']
+
+    def store(self, bucket_name, key, etag, encoding, body):
+        """
+        Caches the body, read from a file-like object, and returns it as an
+        open file.
+        """
+        path = self._path(bucket_name, key)
+        if not os.path.isdir(self.directory):
+            try:
+                os.makedirs(self.directory)
+            except OSError as err:
+                if err.errno != errno.EEXIST:
+                    raise
+        with NamedTemporaryFile(dir=self.directory, prefix='.tmp', delete=False) as temporary:
+            shutil.copyfileobj(body, temporary)
+        os.rename(temporary.name, path)
+        cached = open(path, 'rb')
+        size = os.fstat(cached.fileno()).st_size
+        # The body is in place before its ETag, so that the ETag of a body
+        # is never older than the body itself.
+        with NamedTemporaryFile('w', dir=self.directory, prefix='.tmp', delete=False) as temporary:
+            json.dump({'etag': etag, 'encoding': encoding, 'size': size}, temporary)
+        os.rename(temporary.name, path + '.json')
+        with self._lock:
+            self._track(path, size)
+            self._evict()
+        return cached
+
+    def _track(self, path, size):
+        self._total += size - self._entries.pop(path, 0)
+        self._entries[path] = size
+
+    def _scan(self):
+        """
+        Replaces the tracked entries with the bodies in the directory, least
+        recently read first.
+        """
+        entries = []
+        for filename in os.listdir(self.directory):
+            if filename.startswith('.tmp') or filename.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+        self._entries = OrderedDict((path, size) for _, path, size in sorted(entries))
+        self._total = sum(self._entries.values())
+        self._scanned = time.time()
+
+    def _evict(self):
+        if self._scanned is None or (self._total > self.max_size and
+                                     time.time() - self._scanned > self.scan_interval):
+            self._scan()
+        while self._total > self.max_size and self._entries:
+            path, size = self._entries.popitem(last=False)
+            self._total -= size
+            for remove in (path + '.json', path):
+                try:
+                    os.remove(remove)
+                except OSError as err:
+                    if err.errno != errno.ENOENT:
+                        raise
+
+
+class FileCheckpointStore(object):
+    """
+    Keeps the checkpoints of resumable uploads as JSON files in
+    ``directory``, which processes on the same machine can resume from.
+    """
+    def __init__(self, directory=None):
+        self.directory = directory or os.path.join(gettempdir(), 'storages-checkpoints')
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(force_bytes(key)).hexdigest() + '.json')
+
+    def get(self, key):
+        try:
+            with open(self._path(key)) as checkpoint:
+                return json.load(checkpoint)
+        except IOError as err:
+            if err.errno != errno.ENOENT:
+                raise
+            return None
+
+    def set(self, key, checkpoint):
+        if not os.path.isdir(self.directory):
+            try:
+                os.makedirs(self.directory)
+            except OSError as err:
+                if err.errno != errno.EEXIST:
+                    raise
+        # Replace the checkpoint at once, so that a crash can't leave half of it.
+        with NamedTemporaryFile('w', dir=self.directory, prefix='.tmp', delete=False) as temporary:
+            json.dump(checkpoint, temporary)
+        os.rename(temporary.name, self._path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError as err:
+            if err.errno != errno.ENOENT:
+                raise
+
+
+class CacheCheckpointStore(object):
+    """
+    Keeps the checkpoints of resumable uploads in the Django cache ``alias``,
+    which every process sharing the cache can resume from. Checkpoints don't
+    expire by default, ``abort_stale_uploads()`` deletes those never resumed.
+    """
+    def __init__(self, alias='default', timeout=None, key_prefix='storages-checkpoint:'):
+        self.alias = alias
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+
+    def _key(self, key):
+        # Object keys can be longer than, or hold characters invalid in, cache keys.
+        return self.key_prefix + hashlib.sha1(force_bytes(key)).hexdigest()
+
+    def get(self, key):
+        return caches[self.alias].get(self._key(key))
+
+    def set(self, key, checkpoint):
+        caches[self.alias].set(self._key(key), checkpoint, self.timeout)
+
+    def delete(self, key):
+        caches[self.alias].delete(self._key(key))
+
+
+class _TransferSize(BaseSubscriber):
+    """
+    Provides the size of an object to a managed transfer.
+    """
+    def __init__(self, size):
+        self._size = size
+
+    def on_queued(self, future, **kwargs):
+        future.meta.provide_transfer_size(self._size)
+
 
 @deconstructible
 class S3Boto3StorageFile(File):
@@ -63,9 +415,13 @@ class S3Boto3StorageFile(File):
         self.name = name[len(self._storage.location):].lstrip('/')
         self._mode = mode
         self.obj = storage.bucket.Object(storage._encode_name(name))
-        if 'w' not in mode:
-            # Force early RAII-style exception if object does not exist
-            self.obj.load()
+        # There is no HEAD request up front: whether the object exists, its
+        # size and its encoding are learned from the first GET.
+        self._size = None
+        self._content_encoding = None
+        # The ETag of the object read by ranged reads, which every range after
+        # the first must match.
+        self._etag = None
         self._is_dirty = False
         self._file = None
         self._multipart = None
@@ -76,23 +432,61 @@ class S3Boto3StorageFile(File):
         if buffer_size is not None:
             self.buffer_size = buffer_size
         self._write_counter = 0
+        # The number of bytes written to the buffer since the last part was
+        # uploaded, tracked here rather than by seeking the buffer.
+        self._buffered = 0
+        # The PartNumber and ETag of every part uploaded so far, used to
+        # complete the multipart upload without listing its parts.
+        self._parts = []
+        self._parts_lock = threading.Lock()
+        # Emptied write buffers, ready to be reused for the next part.
+        self._free_buffers = []
+        # The size of every part, recorded in the checkpoint of resumable
+        # uploads, and the number of bytes uploaded by the upload resumed.
+        self._part_sizes = {}
+        self._resume_offset = 0
+        # Whether resume_offset was read, which is what resumes an upload.
+        self._resume_checked = False
+        # Parts handed to the upload pool that have not finished yet.
+        self._upload_executor = None
+        self._pending_parts = set()
+        self._upload_failed = False
+        # Whether the multipart upload turned out to no longer exist.
+        self._upload_gone = False
 
     @property
     def size(self):
+        if self._size is not None:
+            # Recorded when the file was read.
+            return self._size
         return self.obj.content_length
 
     def _get_file(self):
         if self._file is None:
-            self._file = SpooledTemporaryFile(
-                max_size=self._storage.max_memory_size,
-                suffix=".S3Boto3StorageFile",
-                dir=setting("FILE_UPLOAD_TEMP_DIR", None)
-            )
-            if 'r' in self._mode:
-                self._is_dirty = False
-                self._file.write(self.obj.get()['Body'].read())
-                self._file.seek(0)
-            if self._storage.gzip and self.obj.content_encoding == 'gzip':
+            if self._is_cached:
+                self._file = self._get_cached_file()
+            elif self._is_ranged:
+                self._file = io.BufferedReader(
+                    RangedReader(self._fetch_range),
+                    buffer_size=self._storage.ranged_read_buffer_size)
+                if self._storage.gzip:
+                    # Fill the read-ahead buffer, which also tells us the
+                    # encoding of the object.
+                    self._file.peek(1)
+            else:
+                self._file = SpooledTemporaryFile(
+                    max_size=self._storage.max_memory_size,
+                    suffix=".S3Boto3StorageFile",
+                    dir=setting("FILE_UPLOAD_TEMP_DIR", None)
+                )
+                if 'r' in self._mode:
+                    self._is_dirty = False
+                    if self._storage.transfer_reads:
+                        self._download(self._file)
+                    else:
+                        self._file.write(self._get_object()['Body'].read())
+                    self._file.seek(0)
+            if self._storage.gzip and self._content_encoding == 'gzip':
                 self._file = GzipFile(mode=self._mode, fileobj=self._file, mtime=0.0)
         return self._file
 
@@ -101,6 +495,126 @@ class S3Boto3StorageFile(File):
 
     file = property(_get_file, _set_file)
 
+    @property
+    def _is_read_only(self):
+        return 'r' in self._mode and 'w' not in self._mode and '+' not in self._mode
+
+    @property
+    def _is_ranged(self):
+        """
+        Whether reads should download byte ranges on demand rather than the
+        whole object up front. Only used for files opened read-only.
+        """
+        return self._storage.ranged_reads and self._is_read_only
+
+    @property
+    def _is_cached(self):
+        """
+        Whether the body is read through the storage's on-disk cache. Takes
+        precedence over ranged reads, since the whole body is cached.
+        """
+        return self._storage._read_cache is not None and self._is_read_only
+
+    def _get_cached_file(self):
+        cache = self._storage._read_cache
+        cached = cache.open(self.obj.bucket_name, self.obj.key)
+        if cached is None:
+            response = self._get_object()
+        else:
+            cached_file, etag, encoding = cached
+            try:
+                response = self._get_object(IfNoneMatch=etag)
+            except ClientError as err:
+                if err.response['ResponseMetadata']['HTTPStatusCode'] == 304:
+                    self._content_encoding = encoding
+                    self._size = os.fstat(cached_file.fileno()).st_size
+                    return cached_file
+                cached_file.close()
+                raise
+            except Exception:
+                cached_file.close()
+                raise
+            # The object changed since it was cached.
+            cached_file.close()
+
+        if response['ContentLength'] <= cache.max_size:
+            return cache.store(self.obj.bucket_name, self.obj.key, response['ETag'],
+                               self._content_encoding, response['Body'])
+        cached_file = SpooledTemporaryFile(
+            max_size=self._storage.max_memory_size,
+            suffix=".S3Boto3StorageFile",
+            dir=setting("FILE_UPLOAD_TEMP_DIR", None)
+        )
+        cached_file.write(response['Body'].read())
+        cached_file.seek(0)
+        return cached_file
+
+    def _get_object(self, **kwargs):
+        """
+        GETs the object, recording its size and encoding from the response.
+        """
+        try:
+            response = self.obj.get(**kwargs)
+        except ClientError as err:
+            if err.response['ResponseMetadata']['HTTPStatusCode'] == 404:
+                raise IOError('File does not exist: %s' % self.name)
+            raise
+        self._content_encoding = response.get('ContentEncoding')
+        if 'ContentRange' in response:
+            # Content-Range looks like "bytes 0-99/1234"
+            self._size = int(response['ContentRange'].rpartition('/')[2])
+        else:
+            self._size = response['ContentLength']
+        return response
+
+    def _download(self, fileobj):
+        """
+        Downloads the object into ``fileobj`` as a managed transfer, with the
+        storage's transfer configuration.
+        """
+        client = self.obj.meta.client
+        try:
+            response = client.head_object(Bucket=self.obj.bucket_name, Key=self.obj.key)
+        except ClientError as err:
+            if err.response['ResponseMetadata']['HTTPStatusCode'] == 404:
+                raise IOError('File does not exist: %s' % self.name)
+            raise
+        self._content_encoding = response.get('ContentEncoding')
+        self._size = response['ContentLength']
+        # This is download_fileobj(), except that the transfer is told the
+        # size of the object instead of sending a HEAD request of its own.
+        with create_transfer_manager(client, self._storage.transfer_config) as manager:
+            manager.download(self.obj.bucket_name, self.obj.key, fileobj,
+                             subscribers=[_TransferSize(self._size)]).result()
+
+    def _fetch_range(self, start, end):
+        parameters = {'Range': 'bytes=%d-%d' % (start, end)}
+        if self._etag is not None:
+            # Don't join the bytes of an object replaced in the meantime.
+            parameters['IfMatch'] = self._etag
+        try:
+            response = self._get_object(**parameters)
+        except ClientError as err:
+            status = err.response['ResponseMetadata']['HTTPStatusCode']
+            if status == 416:
+                # The range starts past the end of the object. S3 gives its
+                # size in the Content-Range header, "bytes */1234".
+                headers = err.response['ResponseMetadata'].get('HTTPHeaders', {})
+                if 'content-range' in headers:
+                    self._size = int(headers['content-range'].rpartition('/')[2])
+                elif start == 0:
+                    # Only an empty object can't satisfy a range starting at 0.
+                    self._size = 0
+                else:
+                    self._size = self.obj.content_length
+                return b'', self._size
+            if status == 412:
+                raise IOError('File changed while being read: %s' % self.name)
+            raise
+        if self._etag is None:
+            self._etag = response.get('ETag')
+        return response['Body'].read(), self._size
+
     def read(self, *args, **kwargs):
         if 'r' not in self._mode:
             raise AttributeError("File was not opened in read mode.")
@@ -110,6 +624,13 @@ class S3Boto3StorageFile(File):
         if 'w' not in self._mode:
             raise AttributeError("File was not opened in write mode.")
         self._is_dirty = True
+        if (self._multipart is None and self._storage._checkpoint_store is not None and
+                not self._resume_checked):
+            # The writer didn't ask where to resume from, so it is writing the
+            # file from the start. Discard any interrupted upload instead of
+            # appending to it.
+            self._resume_checked = True
+            self._discard_checkpoint()
         if self._multipart is None:
             parameters = self._storage.object_parameters.copy()
             parameters['ACL'] = self._storage.default_acl
@@ -120,44 +641,248 @@ class S3Boto3StorageFile(File):
             if self._storage.encryption:
                 parameters['ServerSideEncryption'] = 'AES256'
             self._multipart = self.obj.initiate_multipart_upload(**parameters)
-        if self.buffer_size <= self._buffer_file_size:
+            with self._parts_lock:
+                self._save_checkpoint()
+        if self.buffer_size <= self._buffered:
             self._flush_write_buffer()
-        return super(S3Boto3StorageFile, self).write(force_bytes(content))
+        content = force_bytes(content)
+        self._buffered += len(content)
+        return super(S3Boto3StorageFile, self).write(content)
+
+    def _flush_write_buffer(self):
+        """
+        Uploads the write buffer as the next part.
+        """
+        if self._buffered:
+            self._write_counter += 1
+            # The buffer itself is the body of the part, so that it isn't
+            # copied. Another buffer takes its place until it is uploaded.
+            body = self.file
+            body.seek(0)
+            with self._parts_lock:
+                self._part_sizes[self._write_counter] = self._buffered
+                if self._free_buffers:
+                    self._file = self._free_buffers.pop()
+                else:
+                    self._file = SpooledTemporaryFile(
+                        max_size=self._storage.max_memory_size,
+                        suffix=".S3Boto3StorageFile",
+                        dir=setting("FILE_UPLOAD_TEMP_DIR", None)
+                    )
+            self._buffered = 0
+            self._upload_part(self._write_counter, body)
 
     @property
-    def _buffer_file_size(self):
-        pos = self.file.tell()
-        self.file.seek(0, os.SEEK_END)
-        length = self.file.tell()
-        self.file.seek(pos)
-        return length
+    def _max_parts_in_flight(self):
+        """
+        The number of parts that may be queued or uploading at once. Each
+        of them holds on to its write buffer until it is sent.
+        """
+        limit = (self._storage.file_upload_max_parts_in_flight or
+                 2 * self._storage.file_upload_concurrency)
+        if self._storage.file_upload_max_memory:
+            limit = min(limit, self._storage.file_upload_max_memory // self.buffer_size)
+        return max(limit, 1)
 
-    def _flush_write_buffer(self):
+    def _upload_part(self, part_number, body):
         """
-        Flushes the write buffer.
+        Uploads a part, either directly or through the upload pool when
+        concurrent uploads are enabled.
         """
-        if self._buffer_file_size:
+        if self._storage.file_upload_concurrency <= 1:
+            try:
+                self._send_part(part_number, body)
+            except Exception as err:
+                # The part's data is gone with its buffer, so the upload
+                # must not be completed with the parts that remain.
+                self._fail(err)
+                raise
+            return
+        if self._upload_executor is None:
+            self._upload_executor = ThreadPoolExecutor(
+                max_workers=self._storage.file_upload_concurrency)
+        # Block the writer until there is room for another part.
+        while len(self._pending_parts) >= self._max_parts_in_flight:
+            self._wait_for_parts(return_when=FIRST_COMPLETED)
+        self._pending_parts.add(self._upload_executor.submit(self._send_part, part_number, body))
+
+    def _send_part(self, part_number, body):
+        try:
+            response = self._multipart.Part(part_number).upload(Body=body)
+        finally:
+            # Empty the buffer to be reused for another part.
+            body.seek(0)
+            body.truncate()
+            with self._parts_lock:
+                self._free_buffers.append(body)
+        with self._parts_lock:
+            self._parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+            self._save_checkpoint()
+
+    @property
+    def resume_offset(self):
+        """
+        The number of bytes of the file uploaded by the interrupted upload
+        this one resumes, and so the offset writing should continue from.
+        Always 0 unless the storage has resumable uploads enabled.
+
+        Reading it before the first write is what resumes the upload, files
+        written without reading it are uploaded from scratch.
+        """
+        if ('w' in self._mode and self._storage._checkpoint_store is not None and
+                not self._resume_checked):
+            self._resume_checked = True
+            self._resume()
+        return self._resume_offset
+
+    @property
+    def _checkpoint_key(self):
+        return '%s/%s' % (self.obj.bucket_name, self.obj.key)
+
+    def _resume(self):
+        """
+        Picks up the multipart upload recorded in the checkpoint of the file,
+        if any, keeping the parts that follow one another from the first.
+        """
+        store = self._storage._checkpoint_store
+        checkpoint = store.get(self._checkpoint_key)
+        if checkpoint is None:
+            return
+        try:
+            self._storage.connection.meta.client.list_parts(
+                Bucket=self.obj.bucket_name, Key=self.obj.key,
+                UploadId=checkpoint['UploadId'], MaxParts=1)
+        except ClientError as err:
+            if err.response['ResponseMetadata']['HTTPStatusCode'] != 404:
+                raise
+            # Aborted in the meantime, e.g. by a lifecycle rule or by
+            # abort_stale_uploads(), so start over with a new upload.
+            store.delete(self._checkpoint_key)
+            return
+        parts = dict((part['PartNumber'], part) for part in checkpoint['Parts'])
+        while self._write_counter + 1 in parts:
             self._write_counter += 1
-            self.file.seek(0)
-            part = self._multipart.Part(self._write_counter)
-            part.upload(Body=self.file.read())
+            part = parts[self._write_counter]
+            self._parts.append({'ETag': part['ETag'], 'PartNumber': self._write_counter})
+            self._part_sizes[self._write_counter] = part['Size']
+            self._resume_offset += part['Size']
+        self._multipart = self.obj.MultipartUpload(checkpoint['UploadId'])
+        # Complete the upload on close() even if nothing else is written.
+        self._is_dirty = self._is_dirty or bool(self._parts)
+
+    def _discard_checkpoint(self):
+        """
+        Aborts the interrupted upload recorded in the checkpoint of the file,
+        if any, and deletes the checkpoint.
+        """
+        store = self._storage._checkpoint_store
+        checkpoint = store.get(self._checkpoint_key)
+        if checkpoint is None:
+            return
+        try:
+            self._storage.connection.meta.client.abort_multipart_upload(
+                Bucket=self.obj.bucket_name, Key=self.obj.key, UploadId=checkpoint['UploadId'])
+        except ClientError as err:
+            # Completed or aborted in the meantime.
+            if err.response['ResponseMetadata']['HTTPStatusCode'] != 404:
+                raise
+        store.delete(self._checkpoint_key)
+
+    def _save_checkpoint(self):
+        """
+        Records the upload and its parts so far in the checkpoint store, if
+        resumable uploads are enabled. Must be called with the parts lock
+        held, so that checkpoints are saved in order.
+        """
+        store = self._storage._checkpoint_store
+        if store is None:
+            return
+        parts = [{'ETag': part['ETag'], 'PartNumber': part['PartNumber'],
+                  'Size': self._part_sizes[part['PartNumber']]} for part in self._parts]
+        store.set(self._checkpoint_key, {'UploadId': self._multipart.id, 'Parts': parts})
+
+    def _abort(self):
+        """
+        Aborts the multipart upload, unless it failed and can be resumed by
+        opening the file again.
+        """
+        store = self._storage._checkpoint_store
+        if self._upload_gone:
+            # Nothing left to abort, nor to resume.
+            if store is not None:
+                store.delete(self._checkpoint_key)
+            return
+        if store is not None and self._upload_failed:
+            return
+        self._multipart.abort()
+        if store is not None:
+            store.delete(self._checkpoint_key)
+
+    def _fail(self, err):
+        """
+        Records that the upload failed with ``err``, so it won't be completed.
+        """
+        self._upload_failed = True
+        if (isinstance(err, ClientError) and
+                err.response.get('ResponseMetadata', {}).get('HTTPStatusCode') == 404):
+            self._upload_gone = True
+
+    def _wait_for_parts(self, return_when=ALL_COMPLETED):
+        """
+        Waits for pending part uploads to finish, re-raising the first
+        error encountered.
+        """
+        done, self._pending_parts = wait(self._pending_parts, return_when=return_when)
+        for future in done:
+            try:
+                future.result()
+            except Exception as err:
+                self._fail(err)
+                raise
+
+    def _shutdown_executor(self):
+        if self._upload_executor is not None:
+            self._upload_executor.shutdown(wait=True)
+            self._upload_executor = None
+        self._pending_parts = set()
 
     def close(self):
-        if self._is_dirty:
-            self._flush_write_buffer()
-            # TODO: Possibly cache the part ids as they're being uploaded
-            # instead of requesting parts from server. For now, emulating
-            # s3boto's behavior.
-            parts = [{'ETag': part.e_tag, 'PartNumber': part.part_number}
-                     for part in self._multipart.parts.all()]
-            self._multipart.complete(
-                MultipartUpload={'Parts': parts})
-        else:
-            if self._multipart is not None:
-                self._multipart.abort()
-        if self._file is not None:
-            self._file.close()
-            self._file = None
+        try:
+            if self._is_dirty and not self._upload_failed:
+                try:
+                    self._flush_write_buffer()
+                    self._wait_for_parts()
+                    # Parts may finish out of order when uploaded concurrently.
+                    parts = sorted(self._parts, key=itemgetter('PartNumber'))
+                    self._multipart.complete(
+                        MultipartUpload={'Parts': parts})
+                except Exception as err:
+                    # Let the parts still in flight finish so that none of them
+                    # outlive the abort and linger in the bucket.
+                    self._shutdown_executor()
+                    if not self._upload_failed:
+                        self._fail(err)
+                    self._abort()
+                    raise
+                finally:
+                    self._shutdown_executor()
+                if self._storage._checkpoint_store is not None:
+                    self._storage._checkpoint_store.delete(self._checkpoint_key)
+                if self._storage._metadata_cache is not None:
+                    # The cache is keyed on names including the location.
+                    self._storage._metadata_cache.invalidate(
+                        self._storage._normalize_name(self._storage._clean_name(self.name)))
+            elif self._multipart is not None:
+                self._shutdown_executor()
+                self._abort()
+        finally:
+            # Close the write buffers even when the upload failed.
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            for buffer in self._free_buffers:
+                buffer.close()
+            self._free_buffers = []
 
 
 @deconstructible
@@ -188,6 +913,10 @@ class S3Boto3Storage(Storage):
     bucket_acl = setting('AWS_BUCKET_ACL', default_acl)
     querystring_auth = setting('AWS_QUERYSTRING_AUTH', True)
     querystring_expire = setting('AWS_QUERYSTRING_EXPIRE', 3600)
+    # Reuse generated URLs until url_cache_fraction of their expiry time has passed
+    cache_urls = setting('AWS_S3_CACHE_URLS', False)
+    url_cache_fraction = setting('AWS_S3_URL_CACHE_FRACTION', 0.5)
+    url_cache_max_entries = setting('AWS_S3_URL_CACHE_MAX_ENTRIES', 10000)
     signature_version = setting('AWS_S3_SIGNATURE_VERSION')
     reduced_redundancy = setting('AWS_REDUCED_REDUNDANCY', False)
     location = setting('AWS_LOCATION', '')
@@ -197,7 +926,18 @@ class S3Boto3Storage(Storage):
     secure_urls = setting('AWS_S3_SECURE_URLS', True)
     file_name_charset = setting('AWS_S3_FILE_NAME_CHARSET', 'utf-8')
     gzip = setting('AWS_IS_GZIPPED', False)
+    gzip_compression_level = setting('AWS_S3_GZIP_COMPRESSION_LEVEL', 6)
+    # The amount of memory gzipped content can take up before being rolled
+    # over to disk. Unlike max_memory_size, it always rolls over, since the
+    # content is compressed in full before it is uploaded.
+    gzip_max_memory_size = setting('AWS_S3_GZIP_MAX_MEMORY_SIZE', 2621440)
+    # Cache the size, modification time and ETag of objects, used by exists(),
+    # size() and get_modified_time(). AWS_PRELOAD_METADATA is an alias kept for
+    # backwards compatibility.
+    cache_metadata = setting('AWS_S3_CACHE_METADATA', False)
     preload_metadata = setting('AWS_PRELOAD_METADATA', False)
+    metadata_cache_ttl = setting('AWS_S3_METADATA_CACHE_TTL', 300)
+    metadata_cache_max_entries = setting('AWS_S3_METADATA_CACHE_MAX_ENTRIES', 10000)
     gzip_content_types = setting('GZIP_CONTENT_TYPES', (
         'text/css',
         'text/javascript',
@@ -209,11 +949,68 @@ class S3Boto3Storage(Storage):
     endpoint_url = setting('AWS_S3_ENDPOINT_URL', None)
     region_name = setting('AWS_S3_REGION_NAME', None)
     use_ssl = setting('AWS_S3_USE_SSL', True)
+    # The size of the connection pool of the boto3 client shared by storages
+    # with the same configuration. Default is None: use botocore's default.
+    max_pool_connections = setting('AWS_S3_MAX_POOL_CONNECTIONS', None)
 
     # The max amount of memory a returned file can take up before being
     # rolled over into a temporary file on disk. Default is 0: Do not roll over.
     max_memory_size = setting('AWS_S3_MAX_MEMORY_SIZE', 0)
 
+    # The number of threads used to upload the parts of a file opened in write
+    # mode. Default is 1: upload each part synchronously as it fills up.
+    file_upload_concurrency = setting('AWS_S3_FILE_UPLOAD_CONCURRENCY', 1)
+    # Limits on how many parts (or bytes) may be waiting for or in the middle of
+    # an upload before writes block. Defaults to twice the concurrency.
+    file_upload_max_parts_in_flight = setting('AWS_S3_FILE_UPLOAD_MAX_PARTS_IN_FLIGHT', None)
+    file_upload_max_memory = setting('AWS_S3_FILE_UPLOAD_MAX_MEMORY', None)
+
+    # The number of requests made at once by operations on many objects,
+    # such as delete_many().
+    batch_concurrency = setting('AWS_S3_BATCH_CONCURRENCY', 4)
+    # Don't upload files whose content is the same as the file they replace,
+    # as told by its ETag.
+    skip_unchanged = setting('AWS_S3_SKIP_UNCHANGED', False)
+    # stat_many() lists a directory rather than sending a HEAD request per
+    # name when at least this many names are looked up in it.
+    stat_many_list_threshold = setting('AWS_S3_STAT_MANY_LIST_THRESHOLD', 20)
+    # Files up to the largest size a single CopyObject request allows are
+    # copied with one, larger files in parts of copy_part_size bytes.
+    max_copy_object_size = 5 * 1024 ** 3
+    copy_part_size = setting('AWS_S3_COPY_PART_SIZE', 512 * 1024 ** 2)
+
+    # Files opened for reading only fetch the byte ranges that are read,
+    # reading ahead by ranged_read_buffer_size bytes at a time, instead of
+    # downloading the whole object when first accessed.
+    ranged_reads = setting('AWS_S3_RANGED_READS', False)
+    ranged_read_buffer_size = setting('AWS_S3_RANGED_READ_BUFFER_SIZE', 1048576)
+
+    # The settings of boto3's managed transfers, used for uploads and, with
+    # transfer_reads, to download files opened for reading in concurrent
+    # ranged GETs rather than a single GET. If transfer_config is provided in
+    # init, the other transfer settings are ignored.
+    transfer_config = None
+    transfer_multipart_threshold = setting('AWS_S3_TRANSFER_MULTIPART_THRESHOLD', 8388608)
+    transfer_multipart_chunksize = setting('AWS_S3_TRANSFER_MULTIPART_CHUNKSIZE', 8388608)
+    transfer_max_concurrency = setting('AWS_S3_TRANSFER_MAX_CONCURRENCY', 10)
+    transfer_use_threads = setting('AWS_S3_TRANSFER_USE_THREADS', True)
+    transfer_reads = setting('AWS_S3_TRANSFER_READS', False)
+
+    # Record the upload ID and parts of files written in parts in a
+    # checkpoint store, so that an interrupted upload can be resumed by
+    # opening the file again. checkpoint_store is the dotted path of the
+    # class of the store, created with checkpoint_store_options.
+    resumable_uploads = setting('AWS_S3_RESUMABLE_UPLOADS', False)
+    checkpoint_store = setting('AWS_S3_CHECKPOINT_STORE',
+                               'storages.backends.s3boto3.FileCheckpointStore')
+    checkpoint_store_options = setting('AWS_S3_CHECKPOINT_STORE_OPTIONS', {})
+
+    # Cache the bodies of files opened for reading in this directory, and
+    # revalidate them with a conditional GET when they are read again.
+    # Default is None: no cache.
+    read_cache_dir = setting('AWS_S3_READ_CACHE_DIR', None)
+    read_cache_max_size = setting('AWS_S3_READ_CACHE_MAX_SIZE', 104857600)
+
     def __init__(self, acl=None, bucket=None, **settings):
         # check if some of the settings we've provided as class attributes
         # need to be overwritten with values passed in here
@@ -234,9 +1031,25 @@ class S3Boto3Storage(Storage):
         if self.secure_urls:
             self.url_protocol = 'https:'
 
-        self._entries = {}
         self._bucket = None
         self._connection = None
+        # Guards the lazy creation of the connection and bucket, reentrant since
+        # creating the bucket needs the connection.
+        self._init_lock = threading.RLock()
+
+        self._setup_caches()
+
+        if not self.transfer_config:
+            transfer_kwargs = {}
+            # Only pass use_threads, which older versions of boto3 lack, if it
+            # varies from the default.
+            if not self.transfer_use_threads:
+                transfer_kwargs['use_threads'] = False
+            self.transfer_config = TransferConfig(
+                multipart_threshold=self.transfer_multipart_threshold,
+                multipart_chunksize=self.transfer_multipart_chunksize,
+                max_concurrency=self.transfer_max_concurrency,
+                **transfer_kwargs)
 
         self.security_token = None
         if not self.access_key and not self.secret_key:
@@ -244,8 +1057,21 @@ class S3Boto3Storage(Storage):
             self.security_token = self._get_security_token()
 
         if not self.config:
+            config_kwargs = {}
+            if self.max_pool_connections:
+                config_kwargs['max_pool_connections'] = self.max_pool_connections
             self.config = Config(s3={'addressing_style': self.addressing_style},
-                                 signature_version=self.signature_version)
+                                 signature_version=self.signature_version,
+                                 **config_kwargs)
+        # Configs are compared by their options, so that storages creating
+        # equal Configs of their own still share a client.
+        config_key = _config_key(self.config)
+        self._connection_key = None
+        if config_key is not None:
+            self._connection_key = (
+                self.access_key, self.secret_key, self.security_token, self.region_name,
+                self.use_ssl, self.endpoint_url, config_key,
+            )
 
     @property
     def connection(self):
@@ -254,19 +1080,36 @@ class S3Boto3Storage(Storage):
         # urllib/requests libraries read. See https://github.com/boto/boto3/issues/338
         # and http://docs.python-requests.org/en/latest/user/advanced/#proxies
         if self._connection is None:
-            session = boto3.session.Session()
-            self._connection = session.resource(
-                's3',
-                aws_access_key_id=self.access_key,
-                aws_secret_access_key=self.secret_key,
-                aws_session_token=self.security_token,
-                region_name=self.region_name,
-                use_ssl=self.use_ssl,
-                endpoint_url=self.endpoint_url,
-                config=self.config
-            )
+            with self._init_lock:
+                if self._connection is None:
+                    self._connection = self._get_connection()
         return self._connection
 
+    def _create_connection(self):
+        session = boto3.session.Session()
+        return session.resource(
+            's3',
+            aws_access_key_id=self.access_key,
+            aws_secret_access_key=self.secret_key,
+            aws_session_token=self.security_token,
+            region_name=self.region_name,
+            use_ssl=self.use_ssl,
+            endpoint_url=self.endpoint_url,
+            config=self.config
+        )
+
+    def _get_connection(self):
+        if self._connection_key is None:
+            return self._create_connection()
+        with _connections_lock:
+            connection = _connections.get(self._connection_key)
+            if connection is None:
+                connection = self._create_connection()
+                _connections.set(self._connection_key, connection)
+        # Clients are thread-safe but resources aren't, so every storage
+        # gets its own resource on top of the shared client.
+        return connection.__class__(client=connection.meta.client)
+
     @property
     def bucket(self):
         """
@@ -274,20 +1117,90 @@ class S3Boto3Storage(Storage):
         create it.
         """
         if self._bucket is None:
-            self._bucket = self._get_or_create_bucket(self.bucket_name)
+            with self._init_lock:
+                if self._bucket is None:
+                    self._bucket = self._get_or_create_bucket(self.bucket_name)
         return self._bucket
 
-    @property
-    def entries(self):
+    def warm_up(self):
+        """
+        Creates the connection and looks up (or creates) the bucket ahead of
+        the first request that needs them, e.g. from ``AppConfig.ready()``.
+        """
+        self.bucket
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Neither the locks nor the boto3 objects can be pickled, they are
+        # recreated on demand or when unpickling.
+        del state['_init_lock']
+        state['_connection'] = state['_bucket'] = None
+        for name in ('_metadata_cache', '_url_cache', '_read_cache', '_checkpoint_store'):
+            state[name] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_lock = threading.RLock()
+        self._setup_caches()
+
+    def _setup_caches(self):
+        """
+        Creates the caches and checkpoint store enabled by the settings, which
+        are not pickled.
         """
-        Get the locally cached files for the bucket.
+        self._metadata_cache = None
+        if self.cache_metadata or self.preload_metadata:
+            self._metadata_cache = S3MetadataCache(
+                self._list_metadata, self._head_metadata,
+                ttl=self.metadata_cache_ttl, max_entries=self.metadata_cache_max_entries)
+
+        self._url_cache = None
+        if self.cache_urls:
+            self._url_cache = LRUCache(self.url_cache_max_entries)
+        self._unsigned_url_prefix = None
+
+        self._read_cache = None
+        if self.read_cache_dir:
+            self._read_cache = S3ReadCache(self.read_cache_dir, self.read_cache_max_size)
+
+        self._checkpoint_store = None
+        if self.resumable_uploads:
+            self._checkpoint_store = import_string(self.checkpoint_store)(
+                **self.checkpoint_store_options)
+
+    def _list_directory(self, prefix, marker=None):
         """
-        if self.preload_metadata and not self._entries:
-            self._entries = {
-                self._decode_name(entry.key): entry
-                for entry in self.bucket.objects.filter(Prefix=self.location)
-            }
-        return self._entries
+        Returns the pages of a listing of the immediate children of ``prefix``,
+        starting after the name ``marker`` if given.
+        """
+        paginator = self.connection.meta.client.get_paginator('list_objects')
+        kwargs = {}
+        if marker is not None:
+            kwargs['Marker'] = self._encode_name(marker)
+        return paginator.paginate(Bucket=self.bucket_name, Prefix=self._encode_name(prefix),
+                                  Delimiter='/', **kwargs)
+
+    def _page_metadata(self, page):
+        for entry in page.get('Contents', ()):
+            yield self._decode_name(entry['Key']), S3ObjectMetadata(
+                entry['Size'], entry['LastModified'], entry['ETag'])
+
+    def _list_metadata(self, prefix):
+        for page in self._list_directory(prefix):
+            for item in self._page_metadata(page):
+                yield item
+
+    def _head_metadata(self, name):
+        try:
+            response = self.connection.meta.client.head_object(
+                Bucket=self.bucket_name, Key=self._encode_name(name))
+        except ClientError as err:
+            if err.response['ResponseMetadata']['HTTPStatusCode'] == 404:
+                return None
+            raise
+        return S3ObjectMetadata(
+            response['ContentLength'], response['LastModified'], response['ETag'])
 
     def _lookup_env(self, names):
         for name in names:
@@ -385,27 +1298,33 @@ class S3Boto3Storage(Storage):
 
     def _compress_content(self, content):
         """Gzip a given string content."""
-        zbuf = BytesIO()
-        zfile = GzipFile(mode='wb', compresslevel=6, fileobj=zbuf)
+        # Compress a chunk at a time into a buffer that rolls over to disk,
+        # so that large files are never held in memory in full, compressed
+        # or not.
+        zbuf = SpooledTemporaryFile(
+            max_size=self.gzip_max_memory_size,
+            suffix=".S3Boto3Storage",
+            dir=setting("FILE_UPLOAD_TEMP_DIR", None)
+        )
+        # A fixed modification time keeps the output the same for the same
+        # content, so unchanged files can be recognised by their ETag.
+        zfile = GzipFile(mode='wb', compresslevel=self.gzip_compression_level,
+                         fileobj=zbuf, mtime=0)
         try:
-            zfile.write(force_bytes(content.read()))
+            for chunk in content.chunks():
+                zfile.write(force_bytes(chunk))
         finally:
             zfile.close()
         zbuf.seek(0)
         # Boto 2 returned the InMemoryUploadedFile with the file pointer replaced,
         # but Boto 3 seems to have issues with that. No need for fp.name in Boto3
-        # so just returning the BytesIO directly
+        # so just returning the buffer directly
         return zbuf
 
     def _open(self, name, mode='rb'):
         name = self._normalize_name(self._clean_name(name))
-        try:
-            f = S3Boto3StorageFile(name, mode, self)
-        except ClientError as err:
-            if err.response['ResponseMetadata']['HTTPStatusCode'] == 404:
-                raise IOError('File does not exist: %s' % name)
-            raise  # Let it bubble up if it was some other error
-        return f
+        # A missing file raises IOError when it is first read.
+        return S3Boto3StorageFile(name, mode, self)
 
     def _save(self, name, content):
         cleaned_name = self._clean_name(name)
@@ -425,70 +1344,373 @@ class S3Boto3Storage(Storage):
             # If the content already has a particular encoding, set it
             parameters.update({'ContentEncoding': encoding})
 
+        if self.skip_unchanged and self._is_unchanged(name, content):
+            return cleaned_name
+
         encoded_name = self._encode_name(name)
         obj = self.bucket.Object(encoded_name)
-        if self.preload_metadata:
-            self._entries[encoded_name] = obj
 
         self._save_content(obj, content, parameters=parameters)
+        if self._metadata_cache is not None:
+            # Only once uploaded, or a lookup during the upload could cache
+            # the metadata of the old file again.
+            self._metadata_cache.invalidate(name)
         # Note: In boto3, after a put, last_modified is automatically reloaded
         # the next time it is accessed; no need to specifically reload it.
         return cleaned_name
 
-    def _save_content(self, obj, content, parameters):
+    def _is_unchanged(self, name, content):
+        """
+        Whether the file ``name`` already holds ``content``, going by its size
+        and ETag.
+        """
+        if self._metadata_cache is not None:
+            metadata = self._metadata_cache.get(name)
+        else:
+            metadata = self._head_metadata(name)
+        if metadata is None:
+            return False
+        content.seek(0, os.SEEK_END)
+        size = content.tell()
+        if size != metadata.size:
+            return False
+        etag = metadata.etag.strip('"')
+        part_size = None
+        if '-' in etag:
+            # The ETag of a multipart upload depends on the size of its parts,
+            # either those of upload_fileobj() or of S3Boto3StorageFile.
+            parts = int(etag.rpartition('-')[2])
+            for candidate in (self.transfer_config.multipart_chunksize,
+                              S3Boto3StorageFile.buffer_size):
+                if -(-size // candidate) == parts:
+                    part_size = candidate
+                    break
+            else:
+                return False
+        return self._content_etag(content, part_size) == etag
+
+    def _content_etag(self, content, part_size=None):
+        """
+        Returns the ETag (without quotes) S3 gives ``content`` when uploaded
+        in a single request or, if ``part_size`` is given, in parts of that
+        many bytes. Encrypting with a customer or KMS key changes the ETag, so
+        those never match.
+        """
+        content.seek(0, os.SEEK_SET)
+        digest = hashlib.md5()
+        digests = []
+        while True:
+            chunk = force_bytes(content.read(part_size or 65536))
+            if not chunk:
+                break
+            if part_size is None:
+                digest.update(chunk)
+            else:
+                digests.append(hashlib.md5(chunk).digest())
+        if part_size is None:
+            return digest.hexdigest()
+        digest.update(b''.join(digests))
+        return '%s-%d' % (digest.hexdigest(), len(digests))
+
+    def _get_write_parameters(self, parameters=None):
         # only pass backwards incompatible arguments if they vary from the default
-        put_parameters = parameters.copy() if parameters else {}
+        write_parameters = parameters.copy() if parameters else {}
         if self.encryption:
-            put_parameters['ServerSideEncryption'] = 'AES256'
+            write_parameters['ServerSideEncryption'] = 'AES256'
         if self.reduced_redundancy:
-            put_parameters['StorageClass'] = 'REDUCED_REDUNDANCY'
+            write_parameters['StorageClass'] = 'REDUCED_REDUNDANCY'
         if self.default_acl:
-            put_parameters['ACL'] = self.default_acl
+            write_parameters['ACL'] = self.default_acl
+        return write_parameters
+
+    def _save_content(self, obj, content, parameters):
+        put_parameters = self._get_write_parameters(parameters)
         content.seek(0, os.SEEK_SET)
-        obj.upload_fileobj(content, ExtraArgs=put_parameters)
+        obj.upload_fileobj(content, ExtraArgs=put_parameters, Config=self.transfer_config)
+
+    def copy(self, src, dst):
+        """
+        Copies the file ``src`` to ``dst`` on the server side and returns the
+        name of the copy. Files larger than a single CopyObject request can
+        handle are copied in parts, ``AWS_S3_BATCH_CONCURRENCY`` at a time.
+        """
+        src_name = self._normalize_name(self._clean_name(src))
+        dst = self.get_available_name(dst)
+        dst_name = self._normalize_name(self._clean_name(dst))
+        copy_source = {'Bucket': self.bucket_name, 'Key': self._encode_name(src_name)}
+        key = self._encode_name(dst_name)
+
+        if self._metadata_cache is not None:
+            metadata = self._metadata_cache.get(src_name)
+        else:
+            metadata = self._head_metadata(src_name)
+        if metadata is None:
+            raise IOError('File does not exist: %s' % src_name)
+
+        parameters = self._get_write_parameters()
+        if metadata.size <= self.max_copy_object_size:
+            self.connection.meta.client.copy_object(
+                Bucket=self.bucket_name, Key=key, CopySource=copy_source, **parameters)
+        else:
+            self._copy_multipart(copy_source, key, metadata.size, parameters)
+        if self._metadata_cache is not None:
+            self._metadata_cache.invalidate(dst_name)
+        return self._clean_name(dst)
+
+    def _copy_multipart(self, copy_source, key, size, parameters):
+        client = self.connection.meta.client
+        # Unlike CopyObject, a multipart upload doesn't carry over the
+        # headers of the source.
+        response = client.head_object(**copy_source)
+        for header in ('CacheControl', 'ContentDisposition', 'ContentEncoding',
+                       'ContentLanguage', 'ContentType', 'Metadata'):
+            if header in response:
+                parameters.setdefault(header, response[header])
+        upload_id = client.create_multipart_upload(
+            Bucket=self.bucket_name, Key=key, **parameters)['UploadId']
+
+        # S3 allows up to 10,000 parts.
+        part_size = max(self.copy_part_size, -(-size // 10000))
+        ranges = [(number, start, min(start + part_size, size) - 1)
+                  for number, start in enumerate(range(0, size, part_size), 1)]
+
+        def copy_part(part_range):
+            number, start, end = part_range
+            response = client.upload_part_copy(
+                Bucket=self.bucket_name, Key=key, UploadId=upload_id, PartNumber=number,
+                CopySource=copy_source, CopySourceRange='bytes=%d-%d' % (start, end))
+            return {'ETag': response['CopyPartResult']['ETag'], 'PartNumber': number}
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.batch_concurrency) as executor:
+                parts = list(executor.map(copy_part, ranges))
+            client.complete_multipart_upload(
+                Bucket=self.bucket_name, Key=key, UploadId=upload_id,
+                MultipartUpload={'Parts': parts})
+        except Exception:
+            client.abort_multipart_upload(Bucket=self.bucket_name, Key=key, UploadId=upload_id)
+            raise
+
+    def move(self, src, dst):
+        """
+        Moves the file ``src`` to ``dst`` on the server side and returns the
+        new name of the file.
+        """
+        if self._normalize_name(self._clean_name(src)) == self._normalize_name(self._clean_name(dst)):
+            # Copying the file onto itself and deleting the source would
+            # delete the only copy.
+            return self._clean_name(src)
+        name = self.copy(src, dst)
+        self.delete(src)
+        return name
 
     def delete(self, name):
         name = self._normalize_name(self._clean_name(name))
         self.bucket.Object(self._encode_name(name)).delete()
+        if self._metadata_cache is not None:
+            self._metadata_cache.remove(name)
+
+    def delete_many(self, names):
+        """
+        Deletes the given files with as few requests as possible and returns
+        a dictionary mapping the names that couldn't be deleted to the error
+        returned by S3, a dictionary with a ``Code`` and a ``Message``.
+        """
+        keys = ((self._encode_name(self._normalize_name(self._clean_name(name))), name)
+                for name in names)
+        return self._delete_keys(keys)
+
+    def delete_prefix(self, name):
+        """
+        Deletes every file whose name starts with ``name``, as listed, and
+        returns the errors like delete_many().
+        """
+        prefix = self._normalize_name(self._clean_name(name))
+        paginator = self.connection.meta.client.get_paginator('list_objects')
+        pages = paginator.paginate(Bucket=self.bucket_name, Prefix=self._encode_name(prefix))
+        keys = ((entry['Key'], self._decode_name(entry['Key'])[len(self.location):].lstrip('/'))
+                for page in pages for entry in page.get('Contents', ()))
+        return self._delete_keys(keys)
+
+    def abort_stale_uploads(self, max_age):
+        """
+        Aborts the multipart uploads under the storage's location that were
+        started longer than ``max_age``, a ``timedelta``, ago, and deletes
+        their checkpoints. Returns the names of the files they were writing.
+        """
+        client = self.connection.meta.client
+        started_before = datetime.now(utc) - max_age
+        paginator = client.get_paginator('list_multipart_uploads')
+        pages = paginator.paginate(
+            Bucket=self.bucket_name, Prefix=self._encode_name(self._normalize_name('')))
+        names = []
+        for page in pages:
+            for upload in page.get('Uploads', ()):
+                if upload['Initiated'] >= started_before:
+                    continue
+                try:
+                    client.abort_multipart_upload(
+                        Bucket=self.bucket_name, Key=upload['Key'], UploadId=upload['UploadId'])
+                except ClientError as err:
+                    # Completed or aborted in the meantime.
+                    if err.response['ResponseMetadata']['HTTPStatusCode'] != 404:
+                        raise
+                if self._checkpoint_store is not None:
+                    key = '%s/%s' % (self.bucket_name, upload['Key'])
+                    checkpoint = self._checkpoint_store.get(key)
+                    if checkpoint is not None and checkpoint['UploadId'] == upload['UploadId']:
+                        self._checkpoint_store.delete(key)
+                names.append(self._decode_name(upload['Key'])[len(self.location):].lstrip('/'))
+        return names
+
+    def _delete_keys(self, keys):
+        """
+        Deletes the keys of the ``(key, name)`` pairs given, in batches of as
+        many as a single DeleteObjects request allows, sent concurrently.
+        """
+        errors = {}
+        batches = iter(lambda: dict(islice(keys, 1000)), {})
+        with ThreadPoolExecutor(max_workers=self.batch_concurrency) as executor:
+            pending = set()
+            for batch in batches:
+                # Don't read further ahead from the keys than needed.
+                if len(pending) >= 2 * self.batch_concurrency:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        errors.update(future.result())
+                pending.add(executor.submit(self._delete_batch, batch))
+            for future in wait(pending).done:
+                errors.update(future.result())
+        return errors
+
+    def _delete_batch(self, batch):
+        response = self.connection.meta.client.delete_objects(
+            Bucket=self.bucket_name,
+            Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True},
+        )
+        errors = {}
+        for error in response.get('Errors', ()):
+            errors[batch[error['Key']]] = {'Code': error['Code'], 'Message': error['Message']}
+        if self._metadata_cache is not None:
+            for key, name in batch.items():
+                if name not in errors:
+                    self._metadata_cache.remove(self._decode_name(key))
+        return errors
 
     def exists(self, name):
         name = self._normalize_name(self._clean_name(name))
-        if self.entries:
-            return name in self.entries
+        if self._metadata_cache is not None:
+            return self._metadata_cache.get(name) is not None
         try:
             self.connection.meta.client.head_object(Bucket=self.bucket_name, Key=name)
             return True
         except ClientError:
             return False
 
+    def stat_many(self, names):
+        """
+        Looks up the metadata of many files at once and returns a dictionary
+        mapping each name to an ``S3ObjectMetadata`` tuple of its size, last
+        modified time and ETag, or to ``None`` if it doesn't exist.
+
+        Directories holding at least ``stat_many_list_threshold`` of the names
+        are listed, from the first name to the last, for as long as that takes
+        fewer requests than the names left to find. The remaining names are
+        looked up with HEAD requests. The requests are sent
+        ``batch_concurrency`` at a time.
+        """
+        # The names given for each normalized name, several names such as
+        # 'a.txt' and './a.txt' can refer to the same file.
+        inputs = {}
+        directories = {}
+        for name in names:
+            normalized = self._normalize_name(self._clean_name(name))
+            inputs.setdefault(normalized, []).append(name)
+            directories.setdefault(S3MetadataCache._prefix(normalized), set()).add(normalized)
+
+        def list_directory(prefix):
+            """
+            Returns the ``(name, metadata)`` pairs of ``prefix`` found by
+            listing it, and the names left to look up with HEAD requests.
+            """
+            wanted = directories[prefix]
+            # Keys are listed in order after the marker, so the first name is
+            # left out of the listing and looked up on its own.
+            names = sorted(wanted)
+            first, rest = names[0], set(names[1:])
+            found = []
+            last_listed = None
+            pages = 0
+            for page in self._list_directory(prefix, marker=first):
+                pages += 1
+                for name, metadata in self._page_metadata(page):
+                    last_listed = name
+                    if name in rest:
+                        rest.remove(name)
+                        found.append((name, metadata))
+                if not rest or (last_listed is not None and last_listed >= names[-1]):
+                    break
+                # Stop once looking the rest up would take fewer requests.
+                if pages >= len(rest):
+                    # Names before the last one listed don't exist.
+                    return found, [first] + [name for name in rest
+                                             if last_listed is None or name > last_listed]
+            return found, [first]
+
+        def head(normalized):
+            return [(normalized, self._head_metadata(normalized))]
+
+        # Names missing from a listing don't exist.
+        results = {}
+        for given in inputs.values():
+            results.update(dict.fromkeys(given))
+
+        def update(found):
+            for normalized, metadata in found:
+                results.update(dict.fromkeys(inputs[normalized], metadata))
+        with ThreadPoolExecutor(max_workers=self.batch_concurrency) as executor:
+            listings = []
+            futures = []
+            for prefix, wanted in directories.items():
+                if len(wanted) >= self.stat_many_list_threshold:
+                    listings.append(executor.submit(list_directory, prefix))
+                else:
+                    futures.extend(executor.submit(head, normalized) for normalized in wanted)
+            for listing in listings:
+                found, remaining = listing.result()
+                update(found)
+                futures.extend(executor.submit(head, normalized) for normalized in remaining)
+            for future in futures:
+                update(future.result())
+        return results
+
     def listdir(self, name):
         name = self._normalize_name(self._clean_name(name))
-        # for the bucket.objects.filter and logic below name needs to end in /
+        # for the listing below name needs to end in /
         # But for the root path "" we leave it as an empty string
         if name and not name.endswith('/'):
             name += '/'
 
+        # Only the immediate children are listed, the keys in subdirectories
+        # are rolled up into their common prefixes by S3.
+        dirs = []
         files = []
-        dirs = set()
-        base_parts = name.split("/")[:-1]
-        for item in self.bucket.objects.filter(Prefix=self._encode_name(name)):
-            parts = item.key.split("/")
-            parts = parts[len(base_parts):]
-            if len(parts) == 1:
-                # File
-                files.append(parts[0])
-            elif len(parts) > 1:
-                # Directory
-                dirs.add(parts[0])
-        return list(dirs), files
+        for page in self._list_directory(name):
+            for entry in page.get('CommonPrefixes', ()):
+                dirs.append(self._decode_name(entry['Prefix'])[len(name):-1])
+            for entry in page.get('Contents', ()):
+                filename = self._decode_name(entry['Key'])[len(name):]
+                # Skip the placeholder some tools create for the directory itself
+                if filename:
+                    files.append(filename)
+        return dirs, files
 
     def size(self, name):
         name = self._normalize_name(self._clean_name(name))
-        if self.entries:
-            entry = self.entries.get(name)
-            if entry:
-                return entry.content_length
-            return 0
+        if self._metadata_cache is not None:
+            metadata = self._metadata_cache.get(name)
+            if metadata is not None:
+                return metadata.size
         return self.bucket.Object(self._encode_name(name)).content_length
 
     def get_modified_time(self, name):
@@ -497,16 +1719,20 @@ class S3Boto3Storage(Storage):
         USE_TZ is True, otherwise returns a naive datetime in the local timezone.
         """
         name = self._normalize_name(self._clean_name(name))
-        entry = self.entries.get(name)
+        metadata = None
+        if self._metadata_cache is not None:
+            metadata = self._metadata_cache.get(name)
         # only call self.bucket.Object() if the key is not found
-        # in the preloaded metadata.
-        if entry is None:
-            entry = self.bucket.Object(self._encode_name(name))
+        # in the cached metadata.
+        if metadata is None:
+            last_modified = self.bucket.Object(self._encode_name(name)).last_modified
+        else:
+            last_modified = metadata.last_modified
         if setting('USE_TZ'):
             # boto3 returns TZ aware timestamps
-            return entry.last_modified
+            return last_modified
         else:
-            return localtime(entry.last_modified).replace(tzinfo=None)
+            return localtime(last_modified).replace(tzinfo=None)
 
     def modified_time(self, name):
         """Returns a naive datetime object containing the last modified time."""
@@ -536,6 +1762,20 @@ class S3Boto3Storage(Storage):
         split_url = split_url._replace(query="&".join(joined_qs))
         return split_url.geturl()
 
+    def _unsigned_url(self, name):
+        """
+        Builds the URL of an object without signing it. The URL of every
+        object in the bucket starts the same, so the part up to the key is
+        taken once from a stripped presigned URL.
+        """
+        if self._unsigned_url_prefix is None:
+            placeholder = 'storages-unsigned-url-placeholder'
+            url = self._strip_signing_parameters(self.bucket.meta.client.generate_presigned_url(
+                'get_object', Params={'Bucket': self.bucket.name, 'Key': placeholder}))
+            self._unsigned_url_prefix = url[:url.rindex(placeholder)]
+        # Quoted the same way botocore quotes keys.
+        return self._unsigned_url_prefix + urlparse.quote(force_bytes(self._encode_name(name)), safe='/~')
+
     def url(self, name, parameters=None, expire=None):
         # Preserve the trailing slash after normalizing the path.
         # TODO: Handle force_http=not self.secure_urls like in s3boto
@@ -543,17 +1783,33 @@ class S3Boto3Storage(Storage):
         if self.custom_domain:
             return "%s//%s/%s" % (self.url_protocol,
                                   self.custom_domain, filepath_to_uri(name))
+        if not self.querystring_auth and not parameters:
+            return self._unsigned_url(name)
         if expire is None:
             expire = self.querystring_expire
 
+        cache_key = None
+        if self._url_cache is not None:
+            try:
+                cache_key = (name, expire, frozenset((parameters or {}).items()))
+            except TypeError:
+                # URLs with parameters that can't be hashed aren't cached.
+                pass
+        if cache_key is not None:
+            url = self._url_cache.get(cache_key)
+            if url is not None:
+                return url
+
         params = parameters.copy() if parameters else {}
         params['Bucket'] = self.bucket.name
         params['Key'] = self._encode_name(name)
         url = self.bucket.meta.client.generate_presigned_url('get_object', Params=params,
                                                              ExpiresIn=expire)
-        if self.querystring_auth:
-            return url
-        return self._strip_signing_parameters(url)
+        if not self.querystring_auth:
+            url = self._strip_signing_parameters(url)
+        if cache_key is not None:
+            self._url_cache.set(cache_key, url, ttl=expire * self.url_cache_fraction)
+        return url
 
     def get_available_name(self, name, max_length=None):
         """Overwrite existing file with the same name."""
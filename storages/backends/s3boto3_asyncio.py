@@ -0,0 +1,143 @@
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.exceptions import ImproperlyConfigured
+
+from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import setting
+
+try:
+    import asyncio
+except ImportError:
+    raise ImproperlyConfigured("The asyncio API of S3Boto3Storage requires Python 3.4 or higher.")
+
+
+class AsyncS3Boto3StorageFile(object):
+    """
+    An asyncio counterpart of S3Boto3StorageFile, returned by
+    ``AsyncS3Boto3Storage.open()``.
+
+    Reads, writes, seeks and closing can all send requests, uploading a part
+    or completing the upload of a file being written, or fetching a range of
+    one being read, so they return awaitables run on the storage's thread
+    pool. Await each call before making the next, the file is not meant to
+    be used by several calls at once. It can be used as an ``async with``
+    context manager, closing it on exit.
+    """
+    def __init__(self, file, storage):
+        self.file = file
+        self._storage = storage
+
+    @property
+    def name(self):
+        return self.file.name
+
+    @property
+    def mode(self):
+        return self.file._mode
+
+    def read(self, *args):
+        return self._storage._run(self.file.read, *args)
+
+    def write(self, content):
+        return self._storage._run(self.file.write, content)
+
+    def seek(self, offset, whence=0):
+        return self._storage._run(self.file.seek, offset, whence)
+
+    def close(self):
+        return self._storage._run(self.file.close)
+
+    def __aenter__(self):
+        # There is nothing to run on the pool, the file is already open.
+        future = asyncio.Future()
+        future.set_result(self)
+        return future
+
+    def __aexit__(self, exc_type, exc_value, traceback):
+        return self.close()
+
+
+class AsyncS3Boto3Storage(object):
+    """
+    An asyncio counterpart of S3Boto3Storage.
+
+    Its methods return awaitables that run the blocking calls of an
+    S3Boto3Storage, given as ``storage`` or created with the other keyword
+    arguments, on a pool of ``max_workers`` threads. Any number of calls can
+    be awaited at once, they queue up for the pool rather than each taking a
+    thread. The storage is shared, so all of its settings, caches and boto3
+    client apply.
+    """
+    # The number of storage calls run at once. Default is None: as many as
+    # the storage's boto3 client has connections.
+    max_workers = setting('AWS_S3_ASYNC_MAX_WORKERS', None)
+
+    def __init__(self, storage=None, max_workers=None, **settings):
+        if storage is None:
+            storage = S3Boto3Storage(**settings)
+        self.storage = storage
+        if max_workers is not None:
+            self.max_workers = max_workers
+        # botocore's default connection pool holds 10 connections, more
+        # threads would only wait for one of them.
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers or storage.max_pool_connections or 10)
+
+    def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_event_loop()
+        return loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def close(self):
+        """
+        Shuts down the thread pool, once the calls already made have finished.
+        """
+        self._executor.shutdown(wait=True)
+
+    def _open(self, name, mode):
+        file = self.storage.open(name, mode)
+        if 'r' in mode:
+            # Download the content, or the first range of it, here rather
+            # than on the first read.
+            file.file
+        return AsyncS3Boto3StorageFile(file, self)
+
+    def open(self, name, mode='rb'):
+        """
+        Opens a file, returning an AsyncS3Boto3StorageFile whose reads,
+        writes and close() are awaitables as well.
+        """
+        return self._run(self._open, name, mode)
+
+    def save(self, name, content, max_length=None):
+        return self._run(self.storage.save, name, content, max_length=max_length)
+
+    def delete(self, name):
+        return self._run(self.storage.delete, name)
+
+    def delete_many(self, names):
+        return self._run(self.storage.delete_many, names)
+
+    def exists(self, name):
+        return self._run(self.storage.exists, name)
+
+    def listdir(self, name):
+        return self._run(self.storage.listdir, name)
+
+    def size(self, name):
+        return self._run(self.storage.size, name)
+
+    def get_modified_time(self, name):
+        return self._run(self.storage.get_modified_time, name)
+
+    def stat_many(self, names):
+        return self._run(self.storage.stat_many, names)
+
+    def url(self, name, parameters=None, expire=None):
+        return self._run(self.storage.url, name, parameters=parameters, expire=expire)
+
+    def copy(self, src, dst):
+        return self._run(self.storage.copy, src, dst)
+
+    def move(self, src, dst):
+        return self._run(self.storage.move, src, dst)
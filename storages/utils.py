@@ -1,4 +1,9 @@
+import io
+import os
 import posixpath
+import threading
+import time
+from collections import OrderedDict
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
@@ -80,3 +85,122 @@ def safe_join(base, *paths):
                          ' component')
 
     return final_path.lstrip('/')
+
+
+class LRUCache(object):
+    """
+    A thread-safe cache holding at most ``max_entries`` items, evicting the
+    least recently used first. Items expire ``ttl`` seconds after being set,
+    or never if it is ``None``.
+    """
+    def __init__(self, max_entries, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # key -> (expiry time or None, value), least recently used first
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                expires, value = self._items.pop(key)
+            except KeyError:
+                return default
+            if expires is not None and expires <= time.time():
+                return default
+            # Move to the most recently used end.
+            self._items[key] = (expires, value)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires = None if ttl is None else time.time() + ttl
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = (expires, value)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._items.pop(key, (None, default))[1]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class RangedReader(io.RawIOBase):
+    """
+    A read-only, seekable raw stream over a remote object which only
+    downloads the byte ranges that are actually read.
+
+    ``fetch(start, end)`` must return a ``(data, size)`` tuple holding the
+    bytes from ``start`` up to and including ``end`` and the total size of
+    the object, or ``None`` if it isn't known. Wrap the reader in an
+    ``io.BufferedReader`` to read ahead and avoid a request per read.
+    """
+    def __init__(self, fetch, size=None):
+        self._fetch = fetch
+        self._size = size
+        self._position = 0
+
+    @property
+    def size(self):
+        if self._size is None:
+            # Learn the size from the smallest possible request.
+            self._read_range(0, 0)
+        return self._size
+
+    def _read_range(self, start, end):
+        data, size = self._fetch(start, end)
+        if size is not None:
+            self._size = size
+        return data
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_SET:
+            position = offset
+        elif whence == os.SEEK_CUR:
+            position = self._position + offset
+        elif whence == os.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError('Invalid whence (%r)' % whence)
+        if position < 0:
+            raise ValueError('Negative seek position %d' % position)
+        self._position = position
+        return position
+
+    def readinto(self, b):
+        if not len(b) or (self._size is not None and self._position >= self._size):
+            return 0
+        end = self._position + len(b) - 1
+        if self._size is not None:
+            end = min(end, self._size - 1)
+        data = self._read_range(self._position, end)
+        length = len(data)
+        b[:length] = data
+        self._position += length
+        return length
+
+    def readall(self):
+        # A single request for the rest of the object rather than the
+        # fixed size chunks RawIOBase.readall() would ask for.
+        if self.size is None or self._position >= self.size:
+            return b''
+        data = self._read_range(self._position, self.size - 1)
+        self._position += len(data)
+        return data
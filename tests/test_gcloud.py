@@ -6,7 +6,9 @@ except ImportError:  # Python 3.2 and below
     import mock
 
 import datetime
+import time
 
+from django.core.exceptions import ImproperlyConfigured
 from django.core.files.base import ContentFile
 from django.test import TestCase
 from django.utils import timezone
@@ -56,6 +58,59 @@ class GCloudStorageTests(GCloudTestCase):
         f.blob.download_to_file = lambda tmpfile: tmpfile.write(data)
         self.assertEqual(f.read(num_bytes), data[0:num_bytes])
 
+    def test_open_read_ranged(self):
+        """
+        Test reading a file a byte range at a time
+        """
+        data = b'0123456789' * 10
+        self.storage.ranged_reads = True
+        self.storage.ranged_read_buffer_size = 16
+        blob = self.storage.bucket.get_blob.return_value
+        blob.size = len(data)
+        blob.media_link = 'https://media/link?alt=media'
+        blob.generation = 7
+        transport = self.storage._transport = mock.MagicMock()
+
+        def get(url, headers):
+            start, end = [int(i) for i in headers['Range'][len('bytes='):].split('-')]
+            return mock.Mock(status_code=206, content=data[start:end + 1])
+        transport.get.side_effect = get
+
+        f = self.storage.open(self.filename)
+        self.assertEqual(f.read(4), b'0123')
+        f.seek(50)
+        self.assertEqual(f.read(4), b'0123')
+        self.assertEqual(transport.get.call_args_list, [
+            mock.call('https://media/link?alt=media&generation=7', headers={'Range': 'bytes=0-15'}),
+            mock.call('https://media/link?alt=media&generation=7', headers={'Range': 'bytes=50-65'}),
+        ])
+        self.assertFalse(blob.download_to_file.called)
+        f.seek(0)
+        self.assertEqual(f.read(), data)
+
+    def test_open_read_ranged_replaced(self):
+        """
+        Test ranged reads fail once the generation read is replaced
+        """
+        self.storage.ranged_reads = True
+        self.storage.ranged_read_buffer_size = 16
+        blob = self.storage.bucket.get_blob.return_value
+        blob.size = 100
+        blob.media_link = 'https://media/link?generation=7&alt=media'
+        blob.generation = 7
+        transport = self.storage._transport = mock.MagicMock()
+        transport.get.side_effect = [
+            mock.Mock(status_code=206, content=b'0123456789abcdef'),
+            mock.Mock(status_code=404, text='Not Found'),
+        ]
+
+        f = self.storage.open(self.filename)
+        self.assertEqual(f.read(4), b'0123')
+        f.seek(50)
+        self.assertRaises(IOError, f.read, 4)
+        transport.get.assert_called_with(
+            'https://media/link?generation=7&alt=media', headers={'Range': 'bytes=50-65'})
+
     def test_open_read_nonexistent(self):
         self.storage._bucket = mock.MagicMock()
         self.storage._bucket.get_blob.return_value = None
@@ -82,6 +137,7 @@ class GCloudStorageTests(GCloudTestCase):
         self.storage._bucket = mock.MagicMock()
         self.storage._bucket.get_blob.return_value = None
 
+        MockBlob.return_value.content_type = None
         f = self.storage.open(self.filename, 'wb')
         MockBlob.assert_called_with(self.filename, self.storage._bucket)
 
@@ -90,19 +146,116 @@ class GCloudStorageTests(GCloudTestCase):
         # File data is not actually written until close(), so do that.
         f.close()
 
-        MockBlob().upload_from_file.assert_called_with(tmpfile)
+        # The content type of the blob replaced is guessed from the name
+        MockBlob().upload_from_file.assert_called_with(tmpfile, content_type='text/plain')
+
+    @mock.patch('storages.backends.gcloud.Blob')
+    def test_open_write_streamed(self, MockBlob):
+        """
+        Test writes are streamed to a resumable upload session in chunks
+        """
+        chunk_size = 256 * 1024
+        self.storage.upload_chunk_size = chunk_size
+        self.storage._bucket = mock.MagicMock()
+        self.storage._bucket.get_blob.return_value = None
+        blob = MockBlob.return_value
+        blob.content_type = None
+        blob.create_resumable_upload_session.return_value = 'https://upload/session'
+        transport = self.storage._transport = mock.MagicMock()
+        sent = []
+
+        def put(url, data, headers):
+            sent.append((data.count(b'a'), data.count(b'b'), headers['Content-Range']))
+            if headers['Content-Range'].endswith('*'):
+                end = headers['Content-Range'].split('-')[1].split('/')[0]
+                return mock.Mock(status_code=308, headers={'range': 'bytes=0-%s' % end})
+            return mock.Mock(status_code=200, **{'json.return_value': {'size': '600000'}})
+        transport.put.side_effect = put
+
+        f = self.storage.open(self.filename, 'wb')
+        f.write(b'a' * 200000)
+        self.assertFalse(transport.put.called)
+        f.write(b'b' * 400000)
+        self.assertEqual(sent, [
+            (200000, 62144, 'bytes 0-262143/*'),
+            (0, 262144, 'bytes 262144-524287/*'),
+        ])
+        self.assertEqual(f._buffered, 75712)
+        f.close()
+
+        self.assertEqual(sent[2:], [(0, 75712, 'bytes 524288-599999/600000')])
+        blob.create_resumable_upload_session.assert_called_once_with(
+            content_type='text/plain', client=self.storage.client)
+        blob._set_properties.assert_called_once_with({'size': '600000'})
+        self.assertFalse(blob.upload_from_file.called)
 
-    def test_save(self):
+    def test_open_write_streamed_large_write(self):
+        """
+        Test a write of several chunks only buffers the remainder
+        """
+        chunk_size = 256 * 1024
+        self.storage.upload_chunk_size = chunk_size
+        f = gcloud.GoogleCloudFile(self.filename, 'wb', self.storage)
+        f._upload_url = 'https://upload/session'
+        transport = self.storage._transport = mock.MagicMock()
+        sent = []
+
+        def put(url, data, headers):
+            sent.append((len(data), headers['Content-Range']))
+            end = headers['Content-Range'].split('-')[1].split('/')[0]
+            return mock.Mock(status_code=308, headers={'range': 'bytes=0-%s' % end})
+        transport.put.side_effect = put
+
+        f.write(b'a' * 10)
+        self.assertEqual(f.write(b'b' * (3 * chunk_size)), 3 * chunk_size)
+        self.assertEqual(sent, [
+            (chunk_size, 'bytes 0-262143/*'),
+            (chunk_size, 'bytes 262144-524287/*'),
+            (chunk_size, 'bytes 524288-786431/*'),
+        ])
+        self.assertEqual(f._buffered, 10)
+        f.file.seek(0)
+        self.assertEqual(f.file.read(), b'b' * 10)
+
+    def test_open_write_streamed_resend(self):
+        """
+        Test the bytes a chunk upload didn't persist are sent again
+        """
+        f = gcloud.GoogleCloudFile(self.filename, 'wb', self.storage)
+        f._upload_url = 'https://upload/session'
+        transport = self.storage._transport = mock.MagicMock()
+        transport.put.side_effect = [
+            mock.Mock(status_code=308, headers={'range': 'bytes=0-3'}),
+            mock.Mock(status_code=200, **{'json.return_value': {}}),
+        ]
+        f._put(b'abcdefgh', final=True)
+        self.assertEqual(transport.put.call_args_list, [
+            mock.call('https://upload/session', data=b'abcdefgh',
+                      headers={'Content-Range': 'bytes 0-7/8'}),
+            mock.call('https://upload/session', data=b'efgh',
+                      headers={'Content-Range': 'bytes 4-7/8'}),
+        ])
+
+    def test_upload_chunk_size_invalid(self):
+        with self.assertRaises(ImproperlyConfigured):
+            gcloud.GoogleCloudStorage(upload_chunk_size=1000)
+
+    @mock.patch('storages.backends.gcloud.Blob')
+    def test_save(self, MockBlob):
         data = 'This is some test content.'
         content = ContentFile(data)
 
         self.storage.save(self.filename, content)
 
         self.storage._client.get_bucket.assert_called_with(self.bucket_name)
-        self.storage._bucket.get_blob().upload_from_file.assert_called_with(
-            content, size=len(data))
+        MockBlob.assert_called_once_with(self.filename, self.storage._bucket)
+        MockBlob.return_value.upload_from_file.assert_called_with(
+            content, size=len(data), content_type='text/plain')
+        # The blob being replaced isn't looked up.
+        self.assertFalse(self.storage._bucket.get_blob.called)
 
-    def test_save2(self):
+    @mock.patch('storages.backends.gcloud.Blob')
+    def test_save2(self, MockBlob):
         data = 'This is some test ủⓝï℅ⅆℇ content.'
         filename = 'ủⓝï℅ⅆℇ.txt'
         content = ContentFile(data)
@@ -110,8 +263,32 @@ class GCloudStorageTests(GCloudTestCase):
         self.storage.save(filename, content)
 
         self.storage._client.get_bucket.assert_called_with(self.bucket_name)
-        self.storage._bucket.get_blob().upload_from_file.assert_called_with(
-            content, size=len(data))
+        MockBlob.return_value.upload_from_file.assert_called_with(
+            content, size=len(data), content_type='text/plain')
+
+    @mock.patch('storages.backends.gcloud.Blob')
+    def test_metadata_cache(self, MockBlob):
+        """
+        Test saved blobs and lookups are cached until deleted
+        """
+        storage = gcloud.GoogleCloudStorage(bucket_name=self.bucket_name, cache_metadata=True)
+        storage._bucket = mock.MagicMock()
+        blob = MockBlob.return_value
+        blob.size = 26
+
+        storage.save(self.filename, ContentFile('This is some test content.'))
+        self.assertTrue(storage.exists(self.filename))
+        self.assertEqual(storage.size(self.filename), 26)
+        self.assertFalse(storage._bucket.get_blob.called)
+
+        storage.delete(self.filename)
+        self.assertFalse(storage.exists(self.filename))
+        self.assertFalse(storage._bucket.get_blob.called)
+
+        storage._bucket.get_blob.return_value = None
+        self.assertFalse(storage.exists('other.txt'))
+        self.assertFalse(storage.exists('other.txt'))
+        storage._bucket.get_blob.assert_called_once_with('other.txt')
 
     def test_delete(self):
         self.storage.delete(self.filename)
@@ -149,49 +326,97 @@ class GCloudStorageTests(GCloudTestCase):
         self.assertTrue(self.storage.exists(''))
         self.storage._client.create_bucket.assert_called_with(self.bucket_name)
 
-    def test_listdir(self):
-        file_names = ["some/path/1.txt", "2.txt", "other/path/3.txt", "4.txt"]
+    def _list_pages(self, *pages):
+        """
+        Returns the iterator of list_blobs() for the given pages, each a list
+        of blob names and a list of prefixes.
+        """
+        iterator = mock.MagicMock()
+        iterator.pages = []
+        for names, prefixes in pages:
+            page = []
+            for name in names:
+                blob = mock.MagicMock(spec=Blob)
+                blob.name = name
+                page.append(blob)
+            iterator.pages.append(mock.MagicMock(
+                __iter__=mock.Mock(return_value=iter(page)), prefixes=tuple(prefixes)))
+        return iterator
 
+    def test_listdir(self):
         self.storage._bucket = mock.MagicMock()
-        self.storage._bucket.list_blobs.return_value = []
-        for name in file_names:
-            blob = mock.MagicMock(spec=Blob)
-            blob.name = name
-            self.storage._bucket.list_blobs.return_value.append(blob)
+        self.storage._bucket.list_blobs.return_value = self._list_pages(
+            (["2.txt"], ["some/"]),
+            (["4.txt"], ["other/"]),
+        )
 
         dirs, files = self.storage.listdir('')
 
-        self.assertEqual(len(dirs), 2)
-        for directory in ["some", "other"]:
-            self.assertTrue(directory in dirs,
-                            """ "%s" not in directory list "%s".""" % (
-                                directory, dirs))
-
-        self.assertEqual(len(files), 2)
-        for filename in ["2.txt", "4.txt"]:
-            self.assertTrue(filename in files,
-                            """ "%s" not in file list "%s".""" % (
-                                filename, files))
+        self.storage._bucket.list_blobs.assert_called_once_with(prefix='', delimiter='/')
+        self.assertEqual(dirs, ["some", "other"])
+        self.assertEqual(files, ["2.txt", "4.txt"])
 
     def test_listdir_subdir(self):
-        file_names = ["some/path/1.txt", "some/2.txt"]
-
         self.storage._bucket = mock.MagicMock()
-        self.storage._bucket.list_blobs.return_value = []
-        for name in file_names:
-            blob = mock.MagicMock(spec=Blob)
-            blob.name = name
-            self.storage._bucket.list_blobs.return_value.append(blob)
+        self.storage._bucket.list_blobs.return_value = self._list_pages(
+            (["some/", "some/2.txt"], ["some/path/"]),
+        )
 
-        dirs, files = self.storage.listdir('some/')
+        dirs, files = self.storage.listdir('some')
 
-        self.assertEqual(len(dirs), 1)
-        self.assertTrue('path' in dirs,
-                        """ "path" not in directory list "%s".""" % (dirs,))
+        self.storage._bucket.list_blobs.assert_called_once_with(prefix='some/', delimiter='/')
+        self.assertEqual(dirs, ["path"])
+        self.assertEqual(files, ["2.txt"])
 
-        self.assertEqual(len(files), 1)
-        self.assertTrue('2.txt' in files,
-                        """ "2.txt" not in files list "%s".""" % (files,))
+    def test_iterdir(self):
+        self.storage._bucket = mock.MagicMock()
+        self.storage._bucket.list_blobs.return_value = self._list_pages(
+            (["some/1.txt", "some/2.txt"], []),
+            (["some/3.txt"], ["some/path/"]),
+        )
+
+        pages = self.storage.iterdir('some/')
+        self.assertEqual(next(pages), ([], ["1.txt", "2.txt"]))
+        self.assertEqual(next(pages), (["path"], ["3.txt"]))
+        self.assertRaises(StopIteration, next, pages)
+
+    def test_walk(self):
+        listings = {
+            '': self._list_pages((["1.txt"], ["a/", "b/"])),
+            'a/': self._list_pages((["a/2.txt"], ["a/c/"]), (["a/3.txt"], [])),
+            'a/c/': self._list_pages((["a/c/4.txt"], [])),
+            'b/': self._list_pages((["b/5.txt"], [])),
+        }
+        self.storage._bucket = mock.MagicMock()
+        self.storage._bucket.list_blobs.side_effect = (
+            lambda prefix, delimiter: listings[prefix])
+
+        self.assertEqual(list(self.storage.walk()), [
+            ('', ['a', 'b'], ['1.txt']),
+            ('a', ['c'], ['2.txt']),
+            ('a/c', [], ['4.txt']),
+            ('a', [], ['3.txt']),
+            ('b', [], ['5.txt']),
+        ])
+
+    def test_walk_prune(self):
+        listings = {
+            'a/': self._list_pages((["a/1.txt"], ["a/b/", "a/c/"])),
+            'a/c/': self._list_pages((["a/c/2.txt"], [])),
+        }
+        self.storage._bucket = mock.MagicMock()
+        self.storage._bucket.list_blobs.side_effect = (
+            lambda prefix, delimiter: listings[prefix])
+
+        result = []
+        for dirpath, dirs, files in self.storage.walk('a'):
+            result.append((dirpath, list(dirs), files))
+            if 'b' in dirs:
+                dirs.remove('b')
+        self.assertEqual(result, [
+            ('a', ['b', 'c'], ['1.txt']),
+            ('a/c', [], ['2.txt']),
+        ])
 
     def test_size(self):
         size = 1234
@@ -253,22 +478,55 @@ class GCloudStorageTests(GCloudTestCase):
 
         self.assertRaises(NotFound, self.storage.modified_time, self.filename)
 
-    def test_url(self):
-        url = 'https://example.com/mah-bukkit/{}'.format(self.filename)
+    def test_transport(self):
+        self.assertIs(self.storage.transport, self.storage.client._http)
 
+    def test_url(self):
+        """
+        Test public URLs are built without fetching the blob
+        """
         self.storage._bucket = mock.MagicMock()
-        blob = mock.MagicMock()
-        blob.public_url = url
-        self.storage._bucket.get_blob.return_value = blob
+        self.storage._bucket.name = 'mah-bukkit'
+        # Newer versions of google-cloud-storage take the host from the client.
+        self.storage._bucket.client.api_endpoint = 'https://storage.googleapis.com'
+
+        self.assertEqual(self.storage.url('some dir ủⓝï℅ⅆℇ.txt'),
+                         'https://storage.googleapis.com/mah-bukkit/'
+                         'some%20dir%20%E1%BB%A7%E2%93%9D%C3%AF%E2%84%85%E2%85%86%E2%84%87.txt')
+        # How slashes are quoted depends on the version of google-cloud-storage.
+        self.assertEqual(self.storage.url('some dir/file.txt'),
+                         Blob('some dir/file.txt', self.storage._bucket).public_url)
+        self.assertFalse(self.storage._bucket.get_blob.called)
+
+    def test_url_no_bucket_fetch(self):
+        self.storage.url(self.filename)
+        self.storage._client.bucket.assert_called_once_with(self.bucket_name)
+        self.assertFalse(self.storage._client.get_bucket.called)
 
-        self.assertEqual(self.storage.url(self.filename), url)
-        self.storage._bucket.get_blob.assert_called_with(self.filename)
+    @mock.patch('storages.backends.gcloud.Blob')
+    def test_url_signed(self, MockBlob):
+        self.storage = gcloud.GoogleCloudStorage(
+            bucket_name=self.bucket_name, querystring_auth=True, signature_version='v4',
+            cache_urls=True)
+        MockBlob.return_value.generate_signed_url.side_effect = ['signed-1', 'signed-2']
+
+        self.assertEqual(self.storage.url(self.filename), 'signed-1')
+        MockBlob.return_value.generate_signed_url.assert_called_once_with(
+            datetime.timedelta(seconds=86400), version='v4')
+        # The signed URL is reused until half of its expiration has passed.
+        with mock.patch('storages.utils.time.time', return_value=time.time() + 43000):
+            self.assertEqual(self.storage.url(self.filename), 'signed-1')
+        with mock.patch('storages.utils.time.time', return_value=time.time() + 43300):
+            self.assertEqual(self.storage.url(self.filename), 'signed-2')
 
-    def test_url_no_file(self):
-        self.storage._bucket = mock.MagicMock()
-        self.storage._bucket.get_blob.return_value = None
+    @mock.patch('storages.backends.gcloud.Blob')
+    def test_url_signed_not_cached(self, MockBlob):
+        self.storage.querystring_auth = True
+        MockBlob.return_value.generate_signed_url.side_effect = ['signed-1', 'signed-2']
 
-        self.assertRaises(NotFound, self.storage.url, self.filename)
+        self.assertEqual(self.storage.url(self.filename), 'signed-1')
+        self.assertEqual(self.storage.url(self.filename), 'signed-2')
+        MockBlob.return_value.generate_signed_url.assert_called_with(datetime.timedelta(seconds=86400))
 
     def test_get_available_name(self):
         self.storage.file_overwrite = True
@@ -2,8 +2,18 @@
 from __future__ import unicode_literals
 
 import gzip
-from datetime import datetime
+import hashlib
+import io
+import itertools
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
 
+from botocore.client import Config
 from botocore.exceptions import ClientError
 from django.conf import settings
 from django.core.files.base import ContentFile
@@ -19,6 +29,13 @@ except ImportError:  # Python 3.2 and below
     import mock
 
 
+def gzip_compress(data):
+    zbuf = io.BytesIO()
+    with gzip.GzipFile(mode='wb', fileobj=zbuf) as zfile:
+        zfile.write(data)
+    return zbuf.getvalue()
+
+
 class S3Boto3TestCase(TestCase):
     def setUp(self):
         self.storage = s3boto3.S3Boto3Storage()
@@ -84,7 +101,8 @@ class S3Boto3StorageTests(S3Boto3TestCase):
             ExtraArgs={
                 'ContentType': 'text/plain',
                 'ACL': self.storage.default_acl,
-            }
+            },
+            Config=self.storage.transfer_config,
         )
 
     def test_storage_save_gzipped(self):
@@ -101,7 +119,8 @@ class S3Boto3StorageTests(S3Boto3TestCase):
                 'ContentType': 'application/octet-stream',
                 'ContentEncoding': 'gzip',
                 'ACL': self.storage.default_acl,
-            }
+            },
+            Config=self.storage.transfer_config,
         )
 
     def test_storage_save_gzip(self):
@@ -119,13 +138,53 @@ class S3Boto3StorageTests(S3Boto3TestCase):
                 'ContentType': 'text/css',
                 'ContentEncoding': 'gzip',
                 'ACL': self.storage.default_acl,
-            }
+            },
+            Config=self.storage.transfer_config,
         )
         args, kwargs = obj.upload_fileobj.call_args
         content = args[0]
         zfile = gzip.GzipFile(mode='rb', fileobj=content)
         self.assertEqual(zfile.read(), b"I should be gzip'd")
 
+    def test_storage_save_skip_unchanged(self):
+        """
+        Test saving the content a file already holds doesn't upload it
+        """
+        self.storage.skip_unchanged = True
+        client = self.storage.connection.meta.client
+        client.head_object.return_value = {
+            'ContentLength': 11,
+            'LastModified': datetime.now(),
+            'ETag': '"%s"' % hashlib.md5(b'new content').hexdigest(),
+        }
+        self.storage.save('test_storage_save.txt', ContentFile(b'new content'))
+        obj = self.storage.bucket.Object.return_value
+        self.assertFalse(obj.upload_fileobj.called)
+
+        self.storage.save('test_storage_save.txt', ContentFile(b'old content'))
+        self.assertTrue(obj.upload_fileobj.called)
+
+    def test_storage_save_skip_unchanged_multipart(self):
+        self.storage.skip_unchanged = True
+        data = b'x' * (s3boto3.S3Boto3StorageFile.buffer_size + 1)
+        digests = [hashlib.md5(data[:-1]).digest(), hashlib.md5(b'x').digest()]
+        client = self.storage.connection.meta.client
+        client.head_object.return_value = {
+            'ContentLength': len(data),
+            'LastModified': datetime.now(),
+            'ETag': '"%s-2"' % hashlib.md5(b''.join(digests)).hexdigest(),
+        }
+        self.storage.save('test_storage_save.txt', ContentFile(data))
+        obj = self.storage.bucket.Object.return_value
+        self.assertFalse(obj.upload_fileobj.called)
+
+    def test_compress_content_deterministic(self):
+        self.storage.gzip = True
+        first = self.storage._compress_content(ContentFile(b'content')).read()
+        with mock.patch('time.time', return_value=time.time() + 100):
+            second = self.storage._compress_content(ContentFile(b'content')).read()
+        self.assertEqual(first, second)
+
     def test_compress_content_len(self):
         """
         Test that file returned by _compress_content() is readable.
@@ -135,6 +194,299 @@ class S3Boto3StorageTests(S3Boto3TestCase):
         content = self.storage._compress_content(content)
         self.assertTrue(len(content.read()) > 0)
 
+    def test_storage_open_read(self):
+        """
+        Test opening a file for reading with a single GET
+        """
+        obj = self.storage.bucket.Object.return_value
+        obj.get.return_value = {
+            'Body': mock.MagicMock(**{'read.return_value': b'content'}),
+            'ContentLength': 7,
+        }
+        file = self.storage.open('test_open_read.txt')
+        self.assertEqual(file.read(), b'content')
+        self.assertEqual(file.size, 7)
+        self.assertFalse(obj.load.called)
+        obj.get.assert_called_once_with()
+
+    def test_storage_open_read_gzipped(self):
+        self.storage.gzip = True
+        obj = self.storage.bucket.Object.return_value
+        obj.get.return_value = {
+            'Body': mock.MagicMock(**{'read.return_value': gzip_compress(b'content')}),
+            'ContentLength': 27,
+            'ContentEncoding': 'gzip',
+        }
+        file = self.storage.open('test_open_read.css')
+        self.assertEqual(file.read(), b'content')
+        obj.get.assert_called_once_with()
+
+    def test_storage_open_read_nonexistent(self):
+        obj = self.storage.bucket.Object.return_value
+        obj.get.side_effect = ClientError(
+            {'Error': {'Code': 'NoSuchKey'}, 'ResponseMetadata': {'HTTPStatusCode': 404}}, 'GetObject')
+        file = self.storage.open('test_open_read_nonexistent.txt')
+        self.assertRaises(IOError, file.read)
+
+    def test_storage_open_read_size(self):
+        """
+        Test the size of a file that wasn't read is looked up without downloading it
+        """
+        obj = self.storage.bucket.Object.return_value
+        obj.content_length = 7
+        file = self.storage.open('test_open_size.txt')
+        self.assertEqual(file.size, 7)
+        self.assertFalse(obj.get.called)
+
+    def test_storage_open_read_transfer(self):
+        """
+        Test reading a file downloaded with the storage's transfer settings
+        """
+        self.storage.transfer_reads = True
+        obj = self.storage.bucket.Object.return_value
+        obj.meta.client.head_object.return_value = {'ContentLength': 7}
+
+        def download(bucket, key, fileobj, subscribers):
+            future = mock.Mock()
+            for subscriber in subscribers:
+                subscriber.on_queued(future)
+            future.meta.provide_transfer_size.assert_called_once_with(7)
+            fileobj.write(b'content')
+            return future
+
+        with mock.patch('storages.backends.s3boto3.create_transfer_manager') as create:
+            manager = create.return_value.__enter__.return_value
+            manager.download.side_effect = download
+            file = self.storage.open('test_open_transfer.txt')
+            self.assertEqual(file.read(), b'content')
+        create.assert_called_once_with(obj.meta.client, self.storage.transfer_config)
+        self.assertEqual(file.size, 7)
+        self.assertFalse(obj.get.called)
+
+    def test_transfer_config(self):
+        storage = s3boto3.S3Boto3Storage(
+            transfer_multipart_threshold=1024, transfer_multipart_chunksize=2048,
+            transfer_max_concurrency=2, transfer_use_threads=False)
+        config = storage.transfer_config
+        self.assertEqual(config.multipart_threshold, 1024)
+        self.assertEqual(config.multipart_chunksize, 2048)
+        self.assertEqual(config.max_concurrency, 2)
+        self.assertFalse(config.use_threads)
+
+    def test_storage_open_read_ranged_empty(self):
+        self.storage.ranged_reads = True
+        obj = self.storage.bucket.Object.return_value
+        obj.get.side_effect = ClientError(
+            {'Error': {'Code': 'InvalidRange'}, 'ResponseMetadata': {'HTTPStatusCode': 416}}, 'GetObject')
+        file = self.storage.open('test_open_read_empty.txt')
+        self.assertEqual(file.read(), b'')
+        self.assertEqual(file.size, 0)
+
+    def test_storage_open_read_ranged(self):
+        """
+        Test reading a file a byte range at a time
+        """
+        data = b'0123456789' * 10
+        self.storage.ranged_reads = True
+        self.storage.ranged_read_buffer_size = 16
+        obj = self.storage.bucket.Object.return_value
+
+        def get(Range):
+            start, end = [int(i) for i in Range[len('bytes='):].split('-')]
+            return {
+                'Body': mock.MagicMock(**{'read.return_value': data[start:end + 1]}),
+                'ContentRange': 'bytes %d-%d/%d' % (start, end, len(data)),
+            }
+        obj.get.side_effect = get
+
+        file = self.storage.open('test_open_ranged.txt')
+        self.assertEqual(file.read(4), b'0123')
+        self.assertEqual(file.size, len(data))
+        file.seek(50)
+        self.assertEqual(file.read(4), b'0123')
+        self.assertEqual(obj.get.call_args_list, [
+            mock.call(Range='bytes=0-15'),
+            mock.call(Range='bytes=50-65'),
+        ])
+        file.seek(0)
+        self.assertEqual(file.read(), data)
+        file.close()
+
+    def test_storage_open_read_ranged_seek(self):
+        """
+        Test seeking before the first read of a ranged file downloads nothing
+        """
+        data = b'0123456789' * 10
+        self.storage.ranged_reads = True
+        self.storage.gzip = False
+        self.storage.ranged_read_buffer_size = 16
+        obj = self.storage.bucket.Object.return_value
+
+        def get(Range):
+            start, end = [int(i) for i in Range[len('bytes='):].split('-')]
+            return {
+                'Body': mock.MagicMock(**{'read.return_value': data[start:end + 1]}),
+                'ContentRange': 'bytes %d-%d/%d' % (start, end, len(data)),
+            }
+        obj.get.side_effect = get
+
+        file = self.storage.open('test_open_ranged_seek.txt')
+        file.seek(40)
+        self.assertFalse(obj.get.called)
+        self.assertEqual(file.read(4), b'0123')
+        obj.get.assert_called_once_with(Range='bytes=40-55')
+        self.assertEqual(file.size, len(data))
+        file.close()
+
+    def test_storage_open_read_ranged_past_end(self):
+        """
+        Test reading past the end of a ranged file before its size is known
+        """
+        self.storage.ranged_reads = True
+        self.storage.gzip = False
+        obj = self.storage.bucket.Object.return_value
+        obj.get.side_effect = ClientError({
+            'Error': {'Code': 'InvalidRange'},
+            'ResponseMetadata': {'HTTPStatusCode': 416, 'HTTPHeaders': {'content-range': 'bytes */50'}},
+        }, 'GetObject')
+
+        file = self.storage.open('test_open_ranged_past_end.txt')
+        file.seek(100)
+        self.assertEqual(file.read(10), b'')
+        self.assertEqual(file.size, 50)
+        self.assertFalse(obj.load.called)
+
+    def test_storage_open_read_ranged_changed(self):
+        """
+        Test ranged reads fail when the object is replaced while being read
+        """
+        self.storage.ranged_reads = True
+        self.storage.ranged_read_buffer_size = 16
+        obj = self.storage.bucket.Object.return_value
+        obj.get.side_effect = [
+            {
+                'Body': mock.MagicMock(**{'read.return_value': b'0123456789abcdef'}),
+                'ContentRange': 'bytes 0-15/100',
+                'ETag': '"abc123"',
+            },
+            ClientError(
+                {'Error': {'Code': 'PreconditionFailed'}, 'ResponseMetadata': {'HTTPStatusCode': 412}},
+                'GetObject'),
+        ]
+
+        file = self.storage.open('test_open_ranged_changed.txt')
+        self.assertEqual(file.read(4), b'0123')
+        file.seek(50)
+        with self.assertRaises(IOError):
+            file.read(4)
+        self.assertEqual(obj.get.call_args_list, [
+            mock.call(Range='bytes=0-15'),
+            mock.call(Range='bytes=50-65', IfMatch='"abc123"'),
+        ])
+
+    def test_storage_open_read_cached(self):
+        """
+        Test a cached file is revalidated with a conditional GET
+        """
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        storage = s3boto3.S3Boto3Storage(read_cache_dir=cache_dir)
+        storage._connection = mock.MagicMock()
+        obj = storage.bucket.Object.return_value
+        obj.bucket_name = 'bucket'
+        obj.key = 'test_open_cached.txt'
+        obj.get.return_value = {
+            'Body': io.BytesIO(b'content'),
+            'ContentLength': 7,
+            'ETag': '"abc123"',
+        }
+        with storage.open('test_open_cached.txt') as file:
+            self.assertEqual(file.read(), b'content')
+        obj.get.assert_called_once_with()
+        # The body and its ETag
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+        obj.get.side_effect = ClientError(
+            {'Error': {'Code': '304'}, 'ResponseMetadata': {'HTTPStatusCode': 304}}, 'GetObject')
+        with storage.open('test_open_cached.txt') as file:
+            self.assertEqual(file.read(), b'content')
+            self.assertEqual(file.size, 7)
+        obj.get.assert_called_with(IfNoneMatch='"abc123"')
+
+        obj.get.side_effect = None
+        obj.get.return_value = {
+            'Body': io.BytesIO(b'changed'),
+            'ContentLength': 7,
+            'ETag': '"def456"',
+        }
+        with storage.open('test_open_cached.txt') as file:
+            self.assertEqual(file.read(), b'changed')
+        obj.get.assert_called_with(IfNoneMatch='"abc123"')
+        # The previous version was replaced.
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+    def test_read_cache_evicts_least_recently_read(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        cache = s3boto3.S3ReadCache(cache_dir, max_size=10)
+        cache.store('bucket', 'a', '"a"', None, io.BytesIO(b'aaaa')).close()
+        cache.store('bucket', 'b', '"b"', 'gzip', io.BytesIO(b'bbbb')).close()
+        with mock.patch('storages.backends.s3boto3.os.listdir') as listdir:
+            file, etag, encoding = cache.open('bucket', 'b')
+            file.close()
+            self.assertEqual((etag, encoding), ('"b"', 'gzip'))
+            cache.store('bucket', 'c', '"c"', None, io.BytesIO(b'cccc')).close()
+            # Neither reads nor stores scan the directory.
+            self.assertFalse(listdir.called)
+        self.assertIsNone(cache.open('bucket', 'a'))
+        self.assertEqual(len(os.listdir(cache_dir)), 4)
+        self.assertEqual(cache._total, 8)
+
+    def test_read_cache_shared(self):
+        """
+        Test the files cached by other processes are found and evicted
+        """
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        other = s3boto3.S3ReadCache(cache_dir, max_size=10)
+        other.store('bucket', 'a', '"a"', None, io.BytesIO(b'aaaa')).close()
+        for filename in os.listdir(cache_dir):
+            os.utime(os.path.join(cache_dir, filename), (0, 0))
+
+        cache = s3boto3.S3ReadCache(cache_dir, max_size=10)
+        file, etag, encoding = cache.open('bucket', 'a')
+        self.assertEqual(file.read(), b'aaaa')
+        file.close()
+        cache.store('bucket', 'b', '"b"', None, io.BytesIO(b'bbbb')).close()
+        cache.store('bucket', 'c', '"c"', None, io.BytesIO(b'cccc')).close()
+        self.assertIsNone(cache.open('bucket', 'a'))
+        self.assertEqual(len(os.listdir(cache_dir)), 4)
+
+    def test_compress_content_chunked(self):
+        """
+        Test that large content is compressed a chunk at a time into a
+        buffer that rolls over to disk.
+        """
+        data = os.urandom(200 * 1024)
+        self.storage.gzip_max_memory_size = 1024
+        self.storage.gzip_compression_level = 1
+        content = ContentFile(data)
+        content.file = mock.Mock(wraps=content.file)
+        zbuf = self.storage._compress_content(content)
+        self.assertTrue(all(args and args[0] < len(data)
+                            for args, kwargs in content.file.read.call_args_list))
+        self.assertTrue(zbuf._rolled)
+        self.assertEqual(gzip.GzipFile(mode='rb', fileobj=zbuf).read(), data)
+
+    def test_compress_content_rolls_over_by_default(self):
+        """
+        Test that gzipped content rolls over to disk with the default settings
+        """
+        data = os.urandom(3 * 1024 * 1024)
+        zbuf = self.storage._compress_content(ContentFile(data))
+        self.assertEqual(self.storage.max_memory_size, 0)
+        self.assertTrue(zbuf._rolled)
+
     def test_storage_open_write(self):
         """
         Test opening a file in write mode
@@ -163,13 +515,301 @@ class S3Boto3StorageTests(S3Boto3TestCase):
 
         # Save the internal file before closing
         multipart = obj.initiate_multipart_upload.return_value
-        multipart.parts.all.return_value = [mock.MagicMock(e_tag='123', part_number=1)]
+        part = multipart.Part.return_value
+        bodies = []
+        part.upload.side_effect = lambda Body: bodies.append(Body.read()) or {'ETag': '123'}
         file.close()
         multipart.Part.assert_called_with(1)
-        part = multipart.Part.return_value
-        part.upload.assert_called_with(Body=content.encode('utf-8'))
+        self.assertEqual(bodies, [content.encode('utf-8')])
         multipart.complete.assert_called_once_with(
             MultipartUpload={'Parts': [{'ETag': '123', 'PartNumber': 1}]})
+        # The parts are tracked locally rather than listed from S3
+        self.assertFalse(multipart.parts.all.called)
+
+    def test_storage_open_write_parts(self):
+        """
+        Test each part holds only what was written since the previous one
+        """
+        file = self.storage.open('test_open_for_writing_parts.txt', 'w')
+        file.buffer_size = 5
+        obj = self.storage.bucket.Object.return_value
+        obj.key = 'test_open_for_writing_parts.txt'
+
+        multipart = obj.initiate_multipart_upload.return_value
+        bodies = []
+        buffers = []
+
+        def part(number):
+            def upload(Body):
+                buffers.append(Body)
+                bodies.append(Body.read())
+                return {'ETag': str(number)}
+            return mock.Mock(**{'upload.side_effect': upload})
+        multipart.Part.side_effect = part
+        for content in ('aaa', 'aaa', 'bb', 'bbbb', 'c'):
+            file.write(content)
+        file.close()
+
+        self.assertEqual(bodies, [b'aaaaaa', b'bbbbbb', b'c'])
+        self.assertEqual(file._buffered, 0)
+        # The parts were uploaded from the write buffers, alternating between two.
+        self.assertEqual(len(set(id(buffer) for buffer in buffers)), 2)
+
+    def test_storage_open_write_concurrent(self):
+        """
+        Test parts being uploaded by the upload pool
+        """
+        self.storage.file_upload_concurrency = 2
+        file = self.storage.open('test_open_for_writing_concurrent.txt', 'w')
+        file.buffer_size = 5
+        obj = self.storage.bucket.Object.return_value
+        obj.key = 'test_open_for_writing_concurrent.txt'
+
+        multipart = obj.initiate_multipart_upload.return_value
+        multipart.Part.side_effect = lambda number: mock.MagicMock(
+            **{'upload.return_value': {'ETag': str(number)}})
+        file.write('aaaaa')
+        file.write('bbbbb')
+        file.close()
+
+        self.assertEqual(multipart.Part.call_args_list, [mock.call(1), mock.call(2)])
+        multipart.complete.assert_called_once_with(
+            MultipartUpload={'Parts': [{'ETag': '1', 'PartNumber': 1},
+                                       {'ETag': '2', 'PartNumber': 2}]})
+        self.assertIsNone(file._upload_executor)
+
+    def test_storage_open_write_concurrent_failure(self):
+        """
+        Test that a failed part aborts the multipart upload on close
+        """
+        self.storage.file_upload_concurrency = 2
+        file = self.storage.open('test_open_for_writing_failure.txt', 'w')
+        obj = self.storage.bucket.Object.return_value
+        obj.key = 'test_open_for_writing_failure.txt'
+        multipart = obj.initiate_multipart_upload.return_value
+        multipart.Part.return_value.upload.side_effect = ClientError(
+            {'Error': {'Code': '500', 'Message': 'Internal Error'}}, 'UploadPart')
+
+        file.write('new content')
+        self.assertRaises(ClientError, file.close)
+        multipart.abort.assert_called_once_with()
+        self.assertFalse(multipart.complete.called)
+
+    def test_storage_open_write_failure(self):
+        """
+        Test that a part failing to upload while writing aborts the upload on close
+        """
+        file = self.storage.open('test_open_for_writing_failure.txt', 'w')
+        file.buffer_size = 5
+        obj = self.storage.bucket.Object.return_value
+        obj.key = 'test_open_for_writing_failure.txt'
+        multipart = obj.initiate_multipart_upload.return_value
+        error = ClientError({'Error': {'Code': '500', 'Message': 'Internal Error'}}, 'UploadPart')
+        multipart.Part.side_effect = lambda number: mock.Mock(**{
+            'upload.side_effect': error if number == 2 else None,
+            'upload.return_value': {'ETag': str(number)}})
+
+        file.write('aaaaa')
+        file.write('bbbbb')
+        self.assertRaises(ClientError, file.write, 'ccccc')
+        file.close()
+        multipart.abort.assert_called_once_with()
+        self.assertFalse(multipart.complete.called)
+
+    def test_storage_open_write_complete_failure(self):
+        """
+        Test that the write buffers are closed when the upload can't be completed
+        """
+        file = self.storage.open('test_open_for_writing_failure.txt', 'w')
+        file.buffer_size = 5
+        obj = self.storage.bucket.Object.return_value
+        obj.key = 'test_open_for_writing_failure.txt'
+        multipart = obj.initiate_multipart_upload.return_value
+        multipart.Part.return_value.upload.return_value = {'ETag': '1'}
+        multipart.complete.side_effect = ClientError(
+            {'Error': {'Code': '500', 'Message': 'Internal Error'}}, 'CompleteMultipartUpload')
+        multipart.abort.side_effect = ClientError(
+            {'Error': {'Code': '500', 'Message': 'Internal Error'}}, 'AbortMultipartUpload')
+
+        file.write('aaaaa')
+        file.write('bbbbb')
+        buffers = [file.file] + file._free_buffers
+        self.assertRaises(ClientError, file.close)
+        self.assertTrue(all(buffer.closed for buffer in buffers))
+        self.assertIsNone(file._file)
+        self.assertEqual(file._free_buffers, [])
+
+    def _resumable_storage(self):
+        checkpoint_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, checkpoint_dir)
+        storage = s3boto3.S3Boto3Storage(
+            resumable_uploads=True, checkpoint_store_options={'directory': checkpoint_dir})
+        storage._connection = mock.MagicMock()
+        obj = storage.bucket.Object.return_value
+        obj.bucket_name = 'bucket'
+        obj.key = 'test_open_for_writing_resumable.txt'
+        obj.initiate_multipart_upload.return_value.id = 'upload-id'
+        obj.MultipartUpload.return_value.id = 'upload-id'
+        for multipart in (obj.initiate_multipart_upload.return_value, obj.MultipartUpload.return_value):
+            multipart.Part.side_effect = lambda number: mock.Mock(
+                **{'upload.return_value': {'ETag': str(number)}})
+        return storage, obj
+
+    def test_storage_open_write_resumable(self):
+        """
+        Test an interrupted upload is resumed from its checkpoint
+        """
+        storage, obj = self._resumable_storage()
+        file = storage.open('test_open_for_writing_resumable.txt', 'w')
+        file.buffer_size = 5
+        self.assertEqual(file.resume_offset, 0)
+        for content in ('aaaaa', 'bbbbb', 'cc'):
+            file.write(content)
+        # The process dies before closing the file.
+
+        resumed = storage.open('test_open_for_writing_resumable.txt', 'w')
+        resumed.buffer_size = 5
+        self.assertEqual(resumed.resume_offset, 10)
+        obj.MultipartUpload.assert_called_once_with('upload-id')
+        resumed.write('cc')
+        resumed.close()
+
+        obj.initiate_multipart_upload.assert_called_once_with(
+            ACL=storage.default_acl, ContentType='text/plain')
+        obj.MultipartUpload.return_value.complete.assert_called_once_with(
+            MultipartUpload={'Parts': [{'ETag': '1', 'PartNumber': 1},
+                                       {'ETag': '2', 'PartNumber': 2},
+                                       {'ETag': '3', 'PartNumber': 3}]})
+        self.assertIsNone(storage._checkpoint_store.get('bucket/test_open_for_writing_resumable.txt'))
+
+    def test_storage_open_write_resumable_not_requested(self):
+        """
+        Test a file written without reading resume_offset starts a new upload
+        """
+        storage, obj = self._resumable_storage()
+        storage._checkpoint_store.set('bucket/test_open_for_writing_resumable.txt', {
+            'UploadId': 'stale-id', 'Parts': [{'ETag': '1', 'PartNumber': 1, 'Size': 5}]})
+        multipart = obj.initiate_multipart_upload.return_value
+        multipart.id = 'new-id'
+        bodies = []
+        multipart.Part.side_effect = lambda number: mock.Mock(**{
+            'upload.side_effect': lambda Body: bodies.append(Body.read()) or {'ETag': str(number)}})
+
+        file = storage.open('test_open_for_writing_resumable.txt', 'w')
+        file.buffer_size = 5
+        for content in ('xxxxx', 'yyyyy', 'zz'):
+            file.write(content)
+        file.close()
+
+        storage.connection.meta.client.abort_multipart_upload.assert_called_once_with(
+            Bucket='bucket', Key='test_open_for_writing_resumable.txt', UploadId='stale-id')
+        self.assertFalse(obj.MultipartUpload.called)
+        self.assertEqual(bodies, [b'xxxxx', b'yyyyy', b'zz'])
+        multipart.complete.assert_called_once_with(
+            MultipartUpload={'Parts': [{'ETag': '1', 'PartNumber': 1},
+                                       {'ETag': '2', 'PartNumber': 2},
+                                       {'ETag': '3', 'PartNumber': 3}]})
+        self.assertIsNone(storage._checkpoint_store.get('bucket/test_open_for_writing_resumable.txt'))
+
+    def test_storage_open_write_resumable_failure(self):
+        """
+        Test a failed resumable upload is kept to be resumed
+        """
+        storage, obj = self._resumable_storage()
+        multipart = obj.initiate_multipart_upload.return_value
+        multipart.Part.side_effect = None
+        multipart.Part.return_value.upload.side_effect = ClientError(
+            {'Error': {'Code': '500', 'Message': 'Internal Error'}}, 'UploadPart')
+        file = storage.open('test_open_for_writing_resumable.txt', 'w')
+        file.write('new content')
+        self.assertRaises(ClientError, file.close)
+        self.assertFalse(multipart.abort.called)
+        self.assertEqual(storage._checkpoint_store.get('bucket/test_open_for_writing_resumable.txt'),
+                         {'UploadId': 'upload-id', 'Parts': []})
+
+    def test_storage_open_write_resumable_upload_gone(self):
+        """
+        Test a checkpoint of an upload aborted in the meantime is replaced
+        """
+        storage, obj = self._resumable_storage()
+        storage._checkpoint_store.set('bucket/test_open_for_writing_resumable.txt', {
+            'UploadId': 'aborted-id', 'Parts': [{'ETag': '1', 'PartNumber': 1, 'Size': 5}]})
+        storage.connection.meta.client.list_parts.side_effect = ClientError(
+            {'Error': {'Code': 'NoSuchUpload'}, 'ResponseMetadata': {'HTTPStatusCode': 404}},
+            'ListParts')
+
+        file = storage.open('test_open_for_writing_resumable.txt', 'w')
+        self.assertEqual(file.resume_offset, 0)
+        file.write('new content')
+        file.close()
+
+        self.assertFalse(obj.MultipartUpload.called)
+        obj.initiate_multipart_upload.return_value.complete.assert_called_once_with(
+            MultipartUpload={'Parts': [{'ETag': '1', 'PartNumber': 1}]})
+        self.assertIsNone(storage._checkpoint_store.get('bucket/test_open_for_writing_resumable.txt'))
+
+    def test_storage_open_write_resumable_upload_gone_while_writing(self):
+        """
+        Test the checkpoint of an upload aborted while writing is deleted
+        """
+        storage, obj = self._resumable_storage()
+        multipart = obj.initiate_multipart_upload.return_value
+        multipart.Part.side_effect = None
+        multipart.Part.return_value.upload.side_effect = ClientError(
+            {'Error': {'Code': 'NoSuchUpload'}, 'ResponseMetadata': {'HTTPStatusCode': 404}},
+            'UploadPart')
+        file = storage.open('test_open_for_writing_resumable.txt', 'w')
+        file.write('new content')
+        self.assertRaises(ClientError, file.close)
+        self.assertFalse(multipart.abort.called)
+        self.assertIsNone(storage._checkpoint_store.get('bucket/test_open_for_writing_resumable.txt'))
+
+    def test_cache_checkpoint_store(self):
+        store = s3boto3.CacheCheckpointStore()
+        checkpoint = {'UploadId': 'upload-id', 'Parts': [{'ETag': '1', 'PartNumber': 1, 'Size': 5}]}
+        store.set('bucket/key', checkpoint)
+        self.assertEqual(store.get('bucket/key'), checkpoint)
+        store.delete('bucket/key')
+        self.assertIsNone(store.get('bucket/key'))
+
+    def test_cache_checkpoint_store_timeout(self):
+        store = s3boto3.CacheCheckpointStore()
+        with mock.patch('storages.backends.s3boto3.caches') as caches:
+            store.set('bucket/key', {'UploadId': 'upload-id', 'Parts': []})
+        caches['default'].set.assert_called_once_with(
+            store._key('bucket/key'), {'UploadId': 'upload-id', 'Parts': []}, None)
+
+    def test_abort_stale_uploads(self):
+        storage, obj = self._resumable_storage()
+        storage.location = 'media'
+        storage._checkpoint_store.set('bucket/media/old.txt', {'UploadId': 'old', 'Parts': []})
+        client = storage.connection.meta.client
+        paginate = client.get_paginator.return_value.paginate
+        paginate.return_value = [{'Uploads': [
+            {'Key': 'media/old.txt', 'UploadId': 'old',
+             'Initiated': datetime.now(utc) - timedelta(days=2)},
+            {'Key': 'media/new.txt', 'UploadId': 'new', 'Initiated': datetime.now(utc)},
+        ]}]
+        storage.bucket_name = 'bucket'
+
+        self.assertEqual(storage.abort_stale_uploads(timedelta(days=1)), ['old.txt'])
+        client.get_paginator.assert_called_with('list_multipart_uploads')
+        paginate.assert_called_with(Bucket='bucket', Prefix='media/')
+        client.abort_multipart_upload.assert_called_once_with(
+            Bucket='bucket', Key='media/old.txt', UploadId='old')
+        self.assertIsNone(storage._checkpoint_store.get('bucket/media/old.txt'))
+
+    def test_max_parts_in_flight(self):
+        file = self.storage.open('test_max_parts_in_flight.txt', 'w')
+        file.buffer_size = 10
+        self.storage.file_upload_concurrency = 4
+        self.assertEqual(file._max_parts_in_flight, 8)
+        self.storage.file_upload_max_parts_in_flight = 3
+        self.assertEqual(file._max_parts_in_flight, 3)
+        self.storage.file_upload_max_memory = 25
+        self.assertEqual(file._max_parts_in_flight, 2)
+        self.storage.file_upload_max_memory = 5
+        self.assertEqual(file._max_parts_in_flight, 1)
 
     def test_auto_creating_bucket(self):
         self.storage.auto_create_bucket = True
@@ -188,6 +828,84 @@ class S3Boto3StorageTests(S3Boto3TestCase):
             }
         )
 
+    @mock.patch('storages.backends.s3boto3._connections', s3boto3.LRUCache(32))
+    @mock.patch('storages.backends.s3boto3.boto3.session.Session')
+    def test_connection_shared(self, Session):
+        class Resource(object):
+            def __init__(self, client):
+                self.meta = mock.MagicMock(client=client)
+
+        Session.return_value.resource.return_value = Resource(client=mock.MagicMock())
+        storage1 = s3boto3.S3Boto3Storage(access_key='foo', secret_key='bar')
+        storage2 = s3boto3.S3Boto3Storage(access_key='foo', secret_key='bar')
+        storage3 = s3boto3.S3Boto3Storage(access_key='foo', secret_key='baz')
+
+        self.assertIsNot(storage1.connection, storage2.connection)
+        self.assertIs(storage1.connection.meta.client, storage2.connection.meta.client)
+        self.assertEqual(Session.return_value.resource.call_count, 1)
+        storage3.connection
+        self.assertEqual(Session.return_value.resource.call_count, 2)
+
+    @mock.patch('storages.backends.s3boto3._connections', s3boto3.LRUCache(32))
+    @mock.patch('storages.backends.s3boto3.boto3.session.Session')
+    def test_connection_shared_custom_config(self, Session):
+        """
+        Test storages given equal Configs share a client, and the registry is bounded
+        """
+        class Resource(object):
+            def __init__(self, client):
+                self.meta = mock.MagicMock(client=client)
+
+        Session.return_value.resource.side_effect = lambda *args, **kwargs: Resource(mock.MagicMock())
+        storages = [s3boto3.S3Boto3Storage(config=Config(max_pool_connections=20)) for _ in range(2)]
+        self.assertIs(storages[0].connection.meta.client, storages[1].connection.meta.client)
+        other = s3boto3.S3Boto3Storage(config=Config(max_pool_connections=30))
+        self.assertIsNot(other.connection.meta.client, storages[0].connection.meta.client)
+        self.assertEqual(Session.return_value.resource.call_count, 2)
+
+        for pool_size in range(40):
+            s3boto3.S3Boto3Storage(config=Config(max_pool_connections=pool_size + 1)).connection
+        self.assertEqual(len(s3boto3._connections), 32)
+
+    def test_max_pool_connections(self):
+        storage = s3boto3.S3Boto3Storage(max_pool_connections=50)
+        self.assertEqual(storage.config.max_pool_connections, 50)
+
+    def test_bucket_created_once(self):
+        storage = s3boto3.S3Boto3Storage()
+        storage._connection = mock.MagicMock()
+        start = threading.Event()
+
+        def get_or_create_bucket(name):
+            time.sleep(0.01)
+            return mock.MagicMock()
+
+        with mock.patch.object(storage, '_get_or_create_bucket',
+                               side_effect=get_or_create_bucket) as method:
+            threads = [threading.Thread(target=lambda: (start.wait(), storage.bucket))
+                       for i in range(4)]
+            for thread in threads:
+                thread.start()
+            start.set()
+            for thread in threads:
+                thread.join()
+        method.assert_called_once_with(storage.bucket_name)
+
+    def test_warm_up(self):
+        with mock.patch.object(self.storage, '_get_or_create_bucket') as method:
+            self.storage.warm_up()
+            self.storage.warm_up()
+        method.assert_called_once_with(self.storage.bucket_name)
+
+    def test_pickle(self):
+        storage = s3boto3.S3Boto3Storage()
+        storage._connection = storage._bucket = 'unpicklable'
+        storage = pickle.loads(pickle.dumps(storage))
+        self.assertIsNone(storage._connection)
+        self.assertIsNone(storage._bucket)
+        with storage._init_lock:
+            pass
+
     def test_storage_exists(self):
         self.assertTrue(self.storage.exists("file.txt"))
         self.storage.connection.meta.client.head_object.assert_called_with(
@@ -216,18 +934,231 @@ class S3Boto3StorageTests(S3Boto3TestCase):
         self.storage.bucket.Object.assert_called_with('path/to/file.txt')
         self.storage.bucket.Object.return_value.delete.assert_called_with()
 
-    def test_storage_listdir_base(self):
-        file_names = ["some/path/1.txt", "2.txt", "other/path/3.txt", "4.txt"]
+    def test_storage_delete_many(self):
+        delete_objects = self.storage.connection.meta.client.delete_objects
+        delete_objects.side_effect = lambda Bucket, Delete: {
+            'Errors': [
+                {'Key': obj['Key'], 'Code': 'AccessDenied', 'Message': 'Access Denied'}
+                for obj in Delete['Objects'] if obj['Key'] == 'path/1.txt'
+            ],
+        }
+        names = ['path/%d.txt' % i for i in range(2500)]
+
+        errors = self.storage.delete_many(names)
+
+        self.assertEqual(errors, {'path/1.txt': {'Code': 'AccessDenied', 'Message': 'Access Denied'}})
+        self.assertEqual(delete_objects.call_count, 3)
+        deleted = []
+        for args, kwargs in delete_objects.call_args_list:
+            self.assertEqual(kwargs['Bucket'], self.storage.bucket_name)
+            self.assertTrue(kwargs['Delete']['Quiet'])
+            self.assertLessEqual(len(kwargs['Delete']['Objects']), 1000)
+            deleted.extend(obj['Key'] for obj in kwargs['Delete']['Objects'])
+        self.assertEqual(sorted(deleted), sorted(names))
+
+    def test_storage_delete_prefix(self):
+        self.storage.location = 'media'
+        paginate = self.storage.connection.meta.client.get_paginator.return_value.paginate
+        paginate.return_value = [
+            {'Contents': [{'Key': 'media/path/1.txt'}, {'Key': 'media/path/to/2.txt'}]},
+            {'Contents': [{'Key': 'media/path/3.txt'}]},
+        ]
+        delete_objects = self.storage.connection.meta.client.delete_objects
+        delete_objects.return_value = {'Errors': [
+            {'Key': 'media/path/3.txt', 'Code': 'AccessDenied', 'Message': 'Access Denied'},
+        ]}
+
+        errors = self.storage.delete_prefix('path/')
+
+        paginate.assert_called_once_with(Bucket=self.storage.bucket_name, Prefix='media/path/')
+        delete_objects.assert_called_once_with(
+            Bucket=self.storage.bucket_name,
+            Delete={'Objects': mock.ANY, 'Quiet': True},
+        )
+        self.assertEqual(
+            sorted(obj['Key'] for obj in delete_objects.call_args[1]['Delete']['Objects']),
+            ['media/path/1.txt', 'media/path/3.txt', 'media/path/to/2.txt'])
+        self.assertEqual(errors, {'path/3.txt': {'Code': 'AccessDenied', 'Message': 'Access Denied'}})
 
-        result = []
-        for p in file_names:
-            obj = mock.MagicMock()
-            obj.key = p
-            result.append(obj)
-        self.storage.bucket.objects.filter.return_value = iter(result)
+    def test_storage_copy(self):
+        client = self.storage.connection.meta.client
+        client.head_object.return_value = {
+            'ContentLength': 1024, 'LastModified': datetime.now(utc), 'ETag': '"abc"'}
+
+        self.assertEqual(self.storage.copy('path/src.txt', 'path/dst.txt'), 'path/dst.txt')
+        client.copy_object.assert_called_once_with(
+            Bucket=self.storage.bucket_name,
+            Key='path/dst.txt',
+            CopySource={'Bucket': self.storage.bucket_name, 'Key': 'path/src.txt'},
+            ACL=self.storage.default_acl,
+        )
+        self.assertFalse(client.create_multipart_upload.called)
+
+    def test_storage_copy_nonexistent(self):
+        self.storage.connection.meta.client.head_object.side_effect = ClientError(
+            {'Error': {}, 'ResponseMetadata': {'HTTPStatusCode': 404}}, 'HeadObject')
+        self.assertRaises(IOError, self.storage.copy, 'src.txt', 'dst.txt')
+
+    def test_storage_copy_multipart(self):
+        client = self.storage.connection.meta.client
+        self.storage.max_copy_object_size = 10
+        self.storage.copy_part_size = 10
+        client.head_object.return_value = {
+            'ContentLength': 25, 'LastModified': datetime.now(utc), 'ETag': '"abc"',
+            'ContentType': 'text/plain', 'Metadata': {'foo': 'bar'},
+        }
+        client.create_multipart_upload.return_value = {'UploadId': 'upload'}
+        client.upload_part_copy.side_effect = lambda **kwargs: {
+            'CopyPartResult': {'ETag': 'etag%d' % kwargs['PartNumber']}}
+
+        self.storage.copy('src.txt', 'dst.txt')
+
+        client.create_multipart_upload.assert_called_once_with(
+            Bucket=self.storage.bucket_name, Key='dst.txt', ACL=self.storage.default_acl,
+            ContentType='text/plain', Metadata={'foo': 'bar'})
+        self.assertEqual(
+            sorted((c[1]['PartNumber'], c[1]['CopySourceRange']) for c in client.upload_part_copy.call_args_list),
+            [(1, 'bytes=0-9'), (2, 'bytes=10-19'), (3, 'bytes=20-24')])
+        client.complete_multipart_upload.assert_called_once_with(
+            Bucket=self.storage.bucket_name, Key='dst.txt', UploadId='upload',
+            MultipartUpload={'Parts': [{'ETag': 'etag1', 'PartNumber': 1},
+                                       {'ETag': 'etag2', 'PartNumber': 2},
+                                       {'ETag': 'etag3', 'PartNumber': 3}]})
+        self.assertFalse(client.copy_object.called)
+
+    def test_storage_copy_multipart_failure(self):
+        client = self.storage.connection.meta.client
+        self.storage.max_copy_object_size = 10
+        self.storage.copy_part_size = 10
+        client.head_object.return_value = {
+            'ContentLength': 25, 'LastModified': datetime.now(utc), 'ETag': '"abc"'}
+        client.create_multipart_upload.return_value = {'UploadId': 'upload'}
+        client.upload_part_copy.side_effect = ClientError(
+            {'Error': {'Code': '500', 'Message': 'Internal Error'}}, 'UploadPartCopy')
+
+        self.assertRaises(ClientError, self.storage.copy, 'src.txt', 'dst.txt')
+        client.abort_multipart_upload.assert_called_once_with(
+            Bucket=self.storage.bucket_name, Key='dst.txt', UploadId='upload')
+        self.assertFalse(client.complete_multipart_upload.called)
+
+    def test_storage_move(self):
+        client = self.storage.connection.meta.client
+        client.head_object.return_value = {
+            'ContentLength': 1024, 'LastModified': datetime.now(utc), 'ETag': '"abc"'}
+
+        self.assertEqual(self.storage.move('src.txt', 'dst.txt'), 'dst.txt')
+        self.assertTrue(client.copy_object.called)
+        self.storage.bucket.Object.assert_called_with('src.txt')
+        self.storage.bucket.Object.return_value.delete.assert_called_with()
+
+    def test_storage_move_onto_itself(self):
+        self.storage.encryption = True
+        client = self.storage.connection.meta.client
+        self.assertEqual(self.storage.move('a.txt', './a.txt'), 'a.txt')
+        self.assertFalse(client.copy_object.called)
+        self.assertFalse(self.storage.bucket.Object.return_value.delete.called)
+
+    def _paginate_keys(self, keys, page_size=1000):
+        """
+        Lists the keys given after the Marker, page_size at a time, counting
+        the pages fetched in self.pages_listed.
+        """
+        modified = datetime(2017, 1, 1, tzinfo=utc)
+        self.pages_listed = 0
+
+        def paginate(Bucket, Prefix, Delimiter, Marker=''):
+            listed = [key for key in sorted(keys) if key.startswith(Prefix) and key > Marker]
+            for start in range(0, len(listed), page_size):
+                self.pages_listed += 1
+                yield {'Contents': [
+                    {'Key': key, 'Size': len(key), 'LastModified': modified, 'ETag': '"%s"' % key}
+                    for key in listed[start:start + page_size]]}
+        self.storage.connection.meta.client.get_paginator.return_value.paginate.side_effect = paginate
+
+    def test_storage_stat_many(self):
+        self.storage.stat_many_list_threshold = 3
+        client = self.storage.connection.meta.client
+        modified = datetime(2017, 1, 1, tzinfo=utc)
+        self._paginate_keys(['dense/a.txt', 'dense/b.txt', 'dense/c.txt', 'dense/other.txt'])
+
+        def head_object(Bucket, Key):
+            if Key == 'sparse/missing.txt':
+                raise ClientError(
+                    {'Error': {'Code': '404'}, 'ResponseMetadata': {'HTTPStatusCode': 404}}, 'HeadObject')
+            return {'ContentLength': 4, 'LastModified': modified, 'ETag': '"s"'}
+        client.head_object.side_effect = head_object
+
+        results = self.storage.stat_many(
+            ['dense/a.txt', 'dense/c.txt', 'dense/missing.txt', 'sparse/c.txt', 'sparse/missing.txt'])
+        self.assertEqual(results, {
+            'dense/a.txt': s3boto3.S3ObjectMetadata(4, modified, '"s"'),
+            'dense/c.txt': s3boto3.S3ObjectMetadata(11, modified, '"dense/c.txt"'),
+            'dense/missing.txt': None,
+            'sparse/c.txt': s3boto3.S3ObjectMetadata(4, modified, '"s"'),
+            'sparse/missing.txt': None,
+        })
+        # The listing starts after the first name, which is looked up on its own.
+        client.get_paginator.return_value.paginate.assert_called_once_with(
+            Bucket=self.storage.bucket_name, Prefix='dense/', Delimiter='/', Marker='dense/a.txt')
+        self.assertEqual(sorted(c[1]['Key'] for c in client.head_object.call_args_list),
+                         ['dense/a.txt', 'sparse/c.txt', 'sparse/missing.txt'])
+
+    def test_storage_stat_many_same_file(self):
+        client = self.storage.connection.meta.client
+        modified = datetime(2017, 1, 1, tzinfo=utc)
+        client.head_object.return_value = {'ContentLength': 4, 'LastModified': modified, 'ETag': '"a"'}
+        metadata = s3boto3.S3ObjectMetadata(4, modified, '"a"')
+        self.assertEqual(self.storage.stat_many(['a.txt', './a.txt']),
+                         {'a.txt': metadata, './a.txt': metadata})
+        client.head_object.assert_called_once_with(Bucket=self.storage.bucket_name, Key='a.txt')
+
+    def test_storage_stat_many_stops_listing(self):
+        """
+        Test a large directory is only listed from the first name to the last,
+        and for no more pages than the names left to find
+        """
+        self.storage.stat_many_list_threshold = 3
+        client = self.storage.connection.meta.client
+        client.head_object.return_value = {
+            'ContentLength': 4, 'LastModified': datetime(2017, 1, 1, tzinfo=utc), 'ETag': '"s"'}
+        keys = ['big/%05d' % i for i in range(1000)]
+        self._paginate_keys(keys, page_size=10)
+
+        results = self.storage.stat_many(['big/00100', 'big/00105', 'big/00112', 'big/00115'])
+        self.assertEqual(results['big/00105'].etag, '"big/00105"')
+        self.assertEqual(results['big/00112'].etag, '"big/00112"')
+        self.assertEqual(results['big/00115'].etag, '"big/00115"')
+        self.assertEqual(self.pages_listed, 2)
+        self.assertEqual(client.head_object.call_count, 1)
+
+        client.head_object.reset_mock()
+        self.pages_listed = 0
+        names = ['big/00001', 'big/00002', 'big/00500', 'big/00900']
+        results = self.storage.stat_many(names)
+        self.assertEqual(set(results), set(names))
+        # Listing up to big/00900 would take 90 pages, the last two names are
+        # looked up instead once two pages have been listed.
+        self.assertEqual(self.pages_listed, 2)
+        self.assertEqual(results['big/00002'].etag, '"big/00002"')
+        self.assertEqual(sorted(c[1]['Key'] for c in client.head_object.call_args_list),
+                         ['big/00001', 'big/00500', 'big/00900'])
+
+    def test_storage_listdir_base(self):
+        paginate = self.storage.connection.meta.client.get_paginator.return_value.paginate
+        paginate.return_value = [
+            {
+                'CommonPrefixes': [{'Prefix': 'some/'}],
+                'Contents': [{'Key': '2.txt'}],
+            },
+            {
+                'CommonPrefixes': [{'Prefix': 'other/'}],
+                'Contents': [{'Key': '4.txt'}],
+            },
+        ]
 
         dirs, files = self.storage.listdir("")
-        self.storage.bucket.objects.filter.assert_called_with(Prefix="")
+        self.storage.connection.meta.client.get_paginator.assert_called_with('list_objects')
+        paginate.assert_called_with(Bucket=self.storage.bucket_name, Prefix="", Delimiter='/')
 
         self.assertEqual(len(dirs), 2)
         for directory in ["some", "other"]:
@@ -242,17 +1173,14 @@ class S3Boto3StorageTests(S3Boto3TestCase):
                                 filename, files))
 
     def test_storage_listdir_subdir(self):
-        file_names = ["some/path/1.txt", "some/2.txt"]
-
-        result = []
-        for p in file_names:
-            obj = mock.MagicMock()
-            obj.key = p
-            result.append(obj)
-        self.storage.bucket.objects.filter.return_value = iter(result)
+        paginate = self.storage.connection.meta.client.get_paginator.return_value.paginate
+        paginate.return_value = [{
+            'CommonPrefixes': [{'Prefix': 'some/path/'}],
+            'Contents': [{'Key': 'some/'}, {'Key': 'some/2.txt'}],
+        }]
 
         dirs, files = self.storage.listdir("some/")
-        self.storage.bucket.objects.filter.assert_called_with(Prefix="some/")
+        paginate.assert_called_with(Bucket=self.storage.bucket_name, Prefix="some/", Delimiter='/')
 
         self.assertEqual(len(dirs), 1)
         self.assertTrue('path' in dirs,
@@ -315,6 +1243,52 @@ class S3Boto3StorageTests(S3Boto3TestCase):
             ExpiresIn=custom_expire
         )
 
+    def test_storage_url_unsigned(self):
+        self.storage.querystring_auth = False
+        self.storage.bucket.name = 'bucket'
+        generate_presigned_url = self.storage.bucket.meta.client.generate_presigned_url
+        generate_presigned_url.side_effect = lambda method, Params: (
+            'https://bucket.s3.amazonaws.com/%s?AWSAccessKeyId=foo&Signature=bar' % Params['Key'])
+
+        self.assertEqual(self.storage.url('whacky & filename.mp4'),
+                         'https://bucket.s3.amazonaws.com/whacky%20%26%20filename.mp4')
+        self.assertEqual(self.storage.url('path/to/file.txt'),
+                         'https://bucket.s3.amazonaws.com/path/to/file.txt')
+        # Only the prefix shared by every URL was ever signed
+        self.assertEqual(generate_presigned_url.call_count, 1)
+
+    def test_storage_url_cached(self):
+        storage = s3boto3.S3Boto3Storage(cache_urls=True)
+        storage._connection = mock.MagicMock()
+        generate_presigned_url = storage.bucket.meta.client.generate_presigned_url
+        signatures = itertools.count()
+        generate_presigned_url.side_effect = lambda method, Params, ExpiresIn: (
+            'https://bucket.s3.amazonaws.com/%s?Signature=%s' % (Params['Key'], next(signatures)))
+
+        with mock.patch('storages.utils.time.time', return_value=1000):
+            url = storage.url('file.txt')
+            self.assertEqual(storage.url('file.txt'), url)
+            self.assertNotEqual(storage.url('file.txt', expire=60), url)
+            self.assertNotEqual(
+                storage.url('file.txt', parameters={'ResponseContentType': 'text/plain'}), url)
+        self.assertEqual(generate_presigned_url.call_count, 3)
+        # Signatures are renewed once half of their lifetime has passed
+        with mock.patch('storages.utils.time.time',
+                        return_value=1000 + storage.querystring_expire / 2):
+            storage.url('file.txt')
+        self.assertEqual(generate_presigned_url.call_count, 4)
+
+    def test_storage_url_cached_unhashable_parameters(self):
+        storage = s3boto3.S3Boto3Storage(cache_urls=True)
+        storage._connection = mock.MagicMock()
+        generate_presigned_url = storage.bucket.meta.client.generate_presigned_url
+        generate_presigned_url.return_value = 'https://bucket.s3.amazonaws.com/file.txt?Signature=1'
+
+        parameters = {'Metadata': {'key': 'value'}}
+        storage.url('file.txt', parameters=parameters)
+        storage.url('file.txt', parameters=parameters)
+        self.assertEqual(generate_presigned_url.call_count, 2)
+
     def test_generated_url_is_encoded(self):
         self.storage.custom_domain = "mock.cloudfront.net"
         filename = "whacky & filename.mp4"
@@ -342,3 +1316,139 @@ class S3Boto3StorageTests(S3Boto3TestCase):
             '%s?X-Amz-Date=12345678&X-Amz-Signature=Signature' % expected), expected)
         self.assertEqual(self.storage._strip_signing_parameters(
             '%s?expires=12345678&signature=Signature' % expected), expected)
+
+
+class S3Boto3MetadataCacheTests(TestCase):
+    def setUp(self):
+        self.storage = s3boto3.S3Boto3Storage(cache_metadata=True)
+        self.storage._connection = mock.MagicMock()
+        self.client = self.storage.connection.meta.client
+        self.paginate = self.client.get_paginator.return_value.paginate
+        self.modified = datetime(2017, 1, 2, 3, 4, 5, tzinfo=utc)
+        self.paginate.side_effect = lambda Bucket, Prefix, Delimiter: [{
+            'Contents': [
+                {'Key': Prefix + name, 'Size': 10, 'LastModified': self.modified, 'ETag': '"abc"'}
+                for name in ('1.txt', '2.txt')
+            ],
+        }]
+
+    def test_exists(self):
+        self.assertTrue(self.storage.exists('path/1.txt'))
+        self.assertTrue(self.storage.exists('path/2.txt'))
+        self.assertFalse(self.storage.exists('path/3.txt'))
+        self.paginate.assert_called_once_with(
+            Bucket=self.storage.bucket_name, Prefix='path/', Delimiter='/')
+        self.assertFalse(self.client.head_object.called)
+
+    def test_size_and_modified_time(self):
+        self.assertEqual(self.storage.size('1.txt'), 10)
+        self.assertEqual(self.storage.get_modified_time('2.txt'), self.modified)
+        self.paginate.assert_called_once_with(
+            Bucket=self.storage.bucket_name, Prefix='', Delimiter='/')
+        self.assertFalse(self.storage.bucket.Object.called)
+
+    def test_ttl(self):
+        with mock.patch('storages.backends.s3boto3.time.time', return_value=1000):
+            self.storage.exists('1.txt')
+            self.storage.exists('1.txt')
+        self.assertEqual(self.paginate.call_count, 1)
+        with mock.patch('storages.backends.s3boto3.time.time',
+                        return_value=1000 + self.storage.metadata_cache_ttl):
+            self.storage.exists('1.txt')
+        self.assertEqual(self.paginate.call_count, 2)
+
+    def test_max_entries(self):
+        self.storage._metadata_cache.max_entries = 2
+        self.storage.exists('a/1.txt')
+        self.storage.exists('b/1.txt')
+        # a/ was evicted to make room for b/
+        self.storage.exists('a/1.txt')
+        self.assertEqual([c[1]['Prefix'] for c in self.paginate.call_args_list], ['a/', 'b/', 'a/'])
+
+    def test_directory_too_large(self):
+        self.storage._metadata_cache.max_entries = 1
+        self.client.head_object.return_value = {
+            'ContentLength': 10, 'LastModified': self.modified, 'ETag': '"abc"'}
+        self.assertTrue(self.storage.exists('1.txt'))
+        self.client.head_object.assert_called_once_with(
+            Bucket=self.storage.bucket_name, Key='1.txt')
+        # The directory isn't listed again until it expires.
+        self.assertTrue(self.storage.exists('2.txt'))
+        self.assertTrue(self.storage.exists('3.txt'))
+        self.assertEqual(self.paginate.call_count, 1)
+        self.assertEqual(self.client.head_object.call_count, 3)
+
+    def test_save_invalidates(self):
+        self.storage.exists('1.txt')
+        self.storage.save('3.txt', ContentFile('new content'))
+        self.client.head_object.return_value = {
+            'ContentLength': 11, 'LastModified': self.modified, 'ETag': '"def"'}
+        self.assertEqual(self.storage.size('3.txt'), 11)
+        self.assertTrue(self.storage.exists('3.txt'))
+        self.assertTrue(self.storage.exists('2.txt'))
+        # Only the saved file is looked up again, once.
+        self.assertEqual(self.paginate.call_count, 1)
+        self.client.head_object.assert_called_once_with(
+            Bucket=self.storage.bucket_name, Key='3.txt')
+
+    def test_save_invalidates_after_upload(self):
+        self.storage.exists('1.txt')
+        self.client.head_object.return_value = {
+            'ContentLength': 10, 'LastModified': self.modified, 'ETag': '"abc"'}
+
+        def upload(*args, **kwargs):
+            # A lookup during the upload still sees the old file.
+            self.assertEqual(self.storage.size('1.txt'), 10)
+        self.storage.bucket.Object.return_value.upload_fileobj.side_effect = upload
+
+        self.storage.save('1.txt', ContentFile('new content'))
+        self.client.head_object.return_value = {
+            'ContentLength': 11, 'LastModified': self.modified, 'ETag': '"def"'}
+        self.assertEqual(self.storage.size('1.txt'), 11)
+
+    def test_open_write_invalidates(self):
+        self.assertFalse(self.storage.exists('3.txt'))
+        self.storage.bucket.Object.return_value.key = '3.txt'
+        file = self.storage.open('3.txt', 'w')
+        file.write('new content')
+        file.close()
+        self.client.head_object.return_value = {
+            'ContentLength': 11, 'LastModified': self.modified, 'ETag': '"def"'}
+        self.assertTrue(self.storage.exists('3.txt'))
+        self.assertEqual(self.storage.size('3.txt'), 11)
+        self.assertEqual(self.paginate.call_count, 1)
+        self.client.head_object.assert_called_once_with(
+            Bucket=self.storage.bucket_name, Key='3.txt')
+
+    def test_open_write_invalidates_location(self):
+        self.storage.location = 'media'
+        self.assertFalse(self.storage.exists('3.txt'))
+        self.storage.bucket.Object.return_value.key = 'media/3.txt'
+        file = self.storage.open('3.txt', 'w')
+        file.write('new content')
+        file.close()
+        self.client.head_object.return_value = {
+            'ContentLength': 11, 'LastModified': self.modified, 'ETag': '"def"'}
+        self.assertTrue(self.storage.exists('3.txt'))
+        self.client.head_object.assert_called_once_with(
+            Bucket=self.storage.bucket_name, Key='media/3.txt')
+
+    def test_save_invalidates_missing(self):
+        self.storage.exists('1.txt')
+        self.storage.save('1.txt', ContentFile('new content'))
+        self.client.head_object.side_effect = ClientError(
+            {'ResponseMetadata': {'HTTPStatusCode': 404}}, 'HeadObject')
+        self.assertFalse(self.storage.exists('1.txt'))
+        self.assertFalse(self.storage.exists('1.txt'))
+        self.assertEqual(self.client.head_object.call_count, 1)
+        self.assertEqual(self.storage._metadata_cache._size, 1)
+
+    def test_delete_removes(self):
+        self.assertTrue(self.storage.exists('1.txt'))
+        self.storage.delete('1.txt')
+        self.assertFalse(self.storage.exists('1.txt'))
+        self.assertEqual(self.paginate.call_count, 1)
+
+    def test_preload_metadata(self):
+        storage = s3boto3.S3Boto3Storage(preload_metadata=True)
+        self.assertIsNotNone(storage._metadata_cache)
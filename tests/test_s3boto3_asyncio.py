@@ -0,0 +1,96 @@
+import sys
+import threading
+import unittest
+
+from django.core.files.base import ContentFile
+from django.test import TestCase
+
+from storages.backends import s3boto3
+
+try:
+    from unittest import mock
+except ImportError:  # Python 3.2 and below
+    import mock
+
+if sys.version_info >= (3, 4):
+    import asyncio
+    from storages.backends import s3boto3_asyncio
+
+
+@unittest.skipIf(sys.version_info < (3, 4), 'asyncio requires Python 3.4 or higher')
+class AsyncS3Boto3StorageTests(TestCase):
+    def setUp(self):
+        self.storage = s3boto3.S3Boto3Storage()
+        self.storage._connection = mock.MagicMock()
+        self.async_storage = s3boto3_asyncio.AsyncS3Boto3Storage(self.storage, max_workers=4)
+        self.addCleanup(self.async_storage.close)
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(asyncio.set_event_loop, None)
+
+    def test_shares_storage(self):
+        async_storage = s3boto3_asyncio.AsyncS3Boto3Storage(bucket_name='bucket', max_pool_connections=20)
+        self.addCleanup(async_storage.close)
+        self.assertEqual(async_storage.storage.bucket_name, 'bucket')
+        self.assertEqual(async_storage._executor._max_workers, 20)
+
+    def test_exists_concurrently(self):
+        threads = set()
+
+        def head_object(**kwargs):
+            threads.add(threading.current_thread())
+            return {}
+        self.storage.connection.meta.client.head_object.side_effect = head_object
+
+        calls = [self.async_storage.exists('file%d.txt' % i) for i in range(20)]
+        results = self.loop.run_until_complete(asyncio.gather(*calls))
+        self.assertEqual(results, [True] * 20)
+        self.assertNotIn(threading.current_thread(), threads)
+        self.assertLessEqual(len(threads), 4)
+
+    def test_save(self):
+        name = self.loop.run_until_complete(
+            self.async_storage.save('test_save.txt', ContentFile(b'content')))
+        self.assertEqual(name, 'test_save.txt')
+        self.assertTrue(self.storage.bucket.Object.return_value.upload_fileobj.called)
+
+    def test_open_read(self):
+        obj = self.storage.bucket.Object.return_value
+        obj.get.return_value = {
+            'Body': mock.MagicMock(**{'read.return_value': b'content'}),
+            'ContentLength': 7,
+        }
+        file = self.loop.run_until_complete(self.async_storage.open('test_open.txt'))
+        obj.get.assert_called_once_with()
+        self.assertIsInstance(file, s3boto3_asyncio.AsyncS3Boto3StorageFile)
+        self.assertEqual(self.loop.run_until_complete(file.read()), b'content')
+        # async with closes the file on exit
+        with mock.patch.object(self.async_storage, '_run') as run:
+            self.assertIs(self.loop.run_until_complete(file.__aenter__()), file)
+        self.assertFalse(run.called)
+        self.loop.run_until_complete(file.__aexit__(None, None, None))
+        self.assertIsNone(file.file._file)
+
+    def test_open_write(self):
+        threads = set()
+        obj = self.storage.bucket.Object.return_value
+        obj.key = 'test_open.txt'
+        multipart = obj.initiate_multipart_upload.return_value
+
+        def upload(Body):
+            threads.add(threading.current_thread())
+            return {'ETag': '1'}
+        multipart.Part.return_value.upload.side_effect = upload
+        multipart.complete.side_effect = lambda **kwargs: threads.add(threading.current_thread())
+
+        file = self.loop.run_until_complete(self.async_storage.open('test_open.txt', 'wb'))
+        file.file.buffer_size = 5
+        for content in (b'aaaaa', b'bbbbb'):
+            self.loop.run_until_complete(file.write(content))
+        self.loop.run_until_complete(file.close())
+
+        self.assertEqual(multipart.Part.return_value.upload.call_count, 2)
+        self.assertTrue(multipart.complete.called)
+        self.assertTrue(threads)
+        self.assertNotIn(threading.current_thread(), threads)
@@ -1,4 +1,5 @@
 import datetime
+import io
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
@@ -6,6 +7,11 @@ from django.test import TestCase
 
 from storages import utils
 
+try:
+    from unittest import mock
+except ImportError:  # Python 3.2 and below
+    import mock
+
 
 class SettingTest(TestCase):
     def test_get_setting(self):
@@ -115,3 +121,79 @@ class SafeJoinTest(TestCase):
     def test_with_base_url_join_nothing(self):
         path = utils.safe_join('base_url')
         self.assertEqual(path, 'base_url/')
+
+
+class LRUCacheTests(TestCase):
+    def test_get_set(self):
+        cache = utils.LRUCache(max_entries=2)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('a', 'default'), 'default')
+        cache.set('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.pop('a'), 1)
+        self.assertIsNone(cache.get('a'))
+
+    def test_evicts_least_recently_used(self):
+        cache = utils.LRUCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_ttl(self):
+        cache = utils.LRUCache(max_entries=2, ttl=10)
+        with mock.patch('storages.utils.time.time', return_value=1000):
+            cache.set('a', 1)
+            cache.set('b', 2, ttl=20)
+        with mock.patch('storages.utils.time.time', return_value=1015):
+            self.assertIsNone(cache.get('a'))
+            self.assertEqual(cache.get('b'), 2)
+
+
+class RangedReaderTests(TestCase):
+    data = b'0123456789abcdefghij'
+
+    def setUp(self):
+        self.fetches = []
+
+    def fetch(self, start, end):
+        self.fetches.append((start, end))
+        return self.data[start:end + 1], len(self.data)
+
+    def test_read_range(self):
+        reader = utils.RangedReader(self.fetch, size=len(self.data))
+        self.assertEqual(reader.read(4), b'0123')
+        self.assertEqual(reader.read(4), b'4567')
+        self.assertEqual(self.fetches, [(0, 3), (4, 7)])
+
+    def test_read_past_end(self):
+        reader = utils.RangedReader(self.fetch, size=len(self.data))
+        reader.seek(18)
+        self.assertEqual(reader.read(10), b'ij')
+        self.assertEqual(reader.read(10), b'')
+        self.assertEqual(self.fetches, [(18, 19)])
+
+    def test_readall(self):
+        reader = utils.RangedReader(self.fetch, size=len(self.data))
+        reader.seek(5)
+        self.assertEqual(reader.read(), self.data[5:])
+        self.assertEqual(self.fetches, [(5, 19)])
+
+    def test_seek_end_unknown_size(self):
+        reader = utils.RangedReader(self.fetch)
+        self.assertEqual(reader.seek(-2, io.SEEK_END), 18)
+        self.assertEqual(reader.read(), b'ij')
+        self.assertEqual(self.fetches, [(0, 0), (18, 19)])
+
+    def test_buffered_read_ahead(self):
+        reader = io.BufferedReader(utils.RangedReader(self.fetch, size=len(self.data)),
+                                   buffer_size=8)
+        self.assertEqual(reader.read(2), b'01')
+        self.assertEqual(reader.read(2), b'23')
+        reader.seek(1)
+        self.assertEqual(reader.read(3), b'123')
+        self.assertEqual(self.fetches, [(0, 7)])